@@ -0,0 +1,164 @@
+'''
+Analyse de pulses sans interface graphique
+
+Analyses .csv/.dat/.bin files (or every shoot of a directory, see BatchAnalyser) with the
+same DataAnalyser as the program and writes the results as CSV or JSON.
+Only the models are imported (no tkinter, matplotlib or caen_felib), so it can be used
+in scripts and on computers without the digitizer.
+
+    python cli.py DAQ/open_on_1-1-2025 pulses-100.CSV --format json --output results.json
+    python cli.py pulses-100.CSV --benchmark
+'''
+import os
+import csv
+import sys
+import json
+import argparse
+
+from src.Model.AnalysisSettings import AnalysisSettings
+from src.Model.BatchAnalyser import BatchAnalyser
+from src.Model.DataAnalyser import DataAnalyser
+from src.Model.Stages.StageRegistry import StageRegistry
+
+from typing import Any, Dict, List, TextIO
+
+
+def parse_args(argv:List[str]|None=None) -> argparse.Namespace:
+    # The default values are the default parameters of the program (Controller.generate_default_parameters)
+    parser = argparse.ArgumentParser(description="FLASHy - Analyse de pulses sans interface graphique")
+    stages = StageRegistry()
+    parser.add_argument('paths', nargs='+',
+                        help="Fichiers à analyser, ou dossiers (tous les shoots qu'ils contiennent)")
+    parser.add_argument('--format', choices=('csv', 'json'), default='csv',
+                        help="Format des résultats (défaut: csv)")
+    parser.add_argument('--output', default='-',
+                        help="Fichier où écrire les résultats ('-': sortie standard)")
+    parser.add_argument('--pulses', action='store_true',
+                        help="Donne l'aire et la dose de chaque pulse (et pas seulement les totaux)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Nombre de processus (défaut: un par coeur)")
+    parser.add_argument('--benchmark', action='store_true',
+                        help="Compare le temps de chaque méthode (mise à niveau, aire, dose) sur les mêmes pulses")
+    parser.add_argument('--area', choices=stages.names('integrator'), default='trap',
+                        help="Méthode du calcul d'aire")
+    parser.add_argument('--leveling', choices=stages.names('leveler'), default='dynamic-median',
+                        help="Méthode de mise à niveau")
+    parser.add_argument('--std-threshold', type=float, default=10,
+                        help="Seuil de l'écart type (LSB), les enregistrements en dessous sont vides")
+    parser.add_argument('--range-threshold', type=float, default=10,
+                        help="Seuil de l'étendue (LSB), les enregistrements en dessous sont vides")
+    parser.add_argument('--window-margin', type=float, default=200,
+                        help="Marge de la fenêtre d'intégration (ns)")
+    parser.add_argument('--precision', choices=('float64', 'float32'), default='float32',
+                        help="Précision des calculs")
+    parser.add_argument('--dose-model', choices=stages.names('dose'), default='linear',
+                        help="Modèle de dose")
+    parser.add_argument('--segmentation', choices=stages.names('segmenter'), default='record',
+                        help="Séparation des pulses empilés ('hysteresis': tous les pulses de chaque enregistrement)")
+    parser.add_argument('--dose-factor', type=float, default=2.0,
+                        help="Facteur de conversion: [nC] --> [cGy]")
+    parser.add_argument('--record-length', type=int, default=15000,
+                        help="Record Lenght (ns)")
+    parser.add_argument('--coarse-gain', type=float, default=3,
+                        help="Plage dynamique de l'entrée en Vpp (10, 3, 1 ou 0.3)")
+    parser.add_argument('--adc-nbit', type=int, default=14,
+                        help="Nombre de bits de l'ADC")
+    parser.add_argument('--mode', choices=('complet', 'par blocs'), default='complet',
+                        help="Mode de lecture")
+    parser.add_argument('--block-size', type=int, default=4096,
+                        help="Taille des blocs (pulses)")
+    parser.add_argument('--cache-size', type=float, default=0,
+                        help="Taille du cache des fichiers lus (Mo, dans le dossier de cache de l'utilisateur), 0: désactive le cache (défaut)")
+    return parser.parse_args(argv)
+
+def find_files(paths:List[str], batch_analyser:BatchAnalyser) -> List[str]:
+    files:List[str] = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(batch_analyser.find_shoots(path))
+        else:
+            files.append(path)
+    return files
+
+def write_results(rows:List[Dict[str, Any]], args:argparse.Namespace, batch_analyser:BatchAnalyser, f:TextIO):
+    if args.format == 'json':
+        json.dump(rows, f, indent=2)
+        f.write('\n')
+    elif args.pulses: # One line per pulse
+        f.write('file,pulse,record,start,end,area,dose\n')
+        for row in rows:
+            pulses = zip(row.get('pulse_records', []), row.get('starts', []), row.get('ends', []), row.get('areas', []), row.get('doses', []))
+            for i, (record, start, end, area, dose) in enumerate(pulses):
+                f.write(f"{row['file']},{i + 1},{record},{start},{end},{area!r},{dose!r}\n")
+    else:
+        batch_analyser.write_csv(rows, f)
+
+def benchmark(files:List[str], settings:AnalysisSettings, args:argparse.Namespace, f:TextIO):
+    # One file at a time (in this process) so the stages are timed on an idle computer
+    rows:List[Dict[str, Any]] = []
+    for path in files:
+        analyser = DataAnalyser(settings)
+        if not analyser.read_file(path):
+            print(f"{path}: {settings.feedback[-1] if settings.feedback else 'Not analysed'}", file=sys.stderr)
+            continue
+        for row in analyser.benchmark_stages():
+            rows.append({'file': path} | row)
+            print(f"{path}: {row['stage']} '{row['name']}' {row['time']:.4f} s", file=sys.stderr)
+    if args.format == 'json':
+        json.dump(rows, f, indent=2)
+        f.write('\n')
+    else:
+        writer = csv.DictWriter(f, fieldnames=('file', 'stage', 'name', 'selected', 'time', 'pulses', 'total_dose'))
+        writer.writeheader()
+        writer.writerows(rows)
+
+def main(argv:List[str]|None=None) -> int:
+    args = parse_args(argv)
+    settings = AnalysisSettings({
+        'RECORD_LENGHT'           : str(args.record_length),
+        'AREA_CALCULATION_METHOD' : args.area,
+        'LEVELING_METHOD'         : args.leveling,
+        'WINDOW_MARGIN'           : max(args.window_margin, 0),
+        'STD_THRESHOLD'           : args.std_threshold,
+        'RANGE_THRESHOLD'         : args.range_threshold,
+        'PRECISION'               : args.precision,
+        'DOSE_MODEL'              : args.dose_model,
+        'SEGMENTATION_METHOD'     : args.segmentation,
+        'DOSE_FACTOR'             : args.dose_factor,
+        'READING_MODE'            : args.mode,
+        'BLOCK_SIZE'              : max(args.block_size, 1),
+        'CACHE_SIZE'              : int(args.cache_size * 2**20),
+        'COARSEGAIN'              : args.coarse_gain,
+        'ADC_NBIT'                : args.adc_nbit,
+    })
+    batch_analyser = BatchAnalyser(args.workers)
+    
+    files = find_files(args.paths, batch_analyser)
+    if not files:
+        print("No file to analyse!", file=sys.stderr)
+        return 1
+    
+    if args.benchmark:
+        if args.output == '-':
+            benchmark(files, settings, args, sys.stdout)
+        else:
+            with open(args.output, 'w', newline='') as f:
+                benchmark(files, settings, args, f)
+        return 0
+    
+    def progress(row:Dict[str, Any]):
+        # The results can go to the standard output, the progress goes to the standard error
+        print(f"{row['file']}: {row['error'] or str(row['pulses']) + ' pulses'}", file=sys.stderr)
+    rows = batch_analyser.analyse(files, settings, progress, keep_pulses=args.pulses)
+    
+    if args.output == '-':
+        write_results(rows, args, batch_analyser, sys.stdout)
+    else:
+        with open(args.output, 'w', newline='') as f:
+            write_results(rows, args, batch_analyser, f)
+    # Empty files (a channel without pulses) are normal, only fail if nothing was analysed
+    return 0 if any(row['pulses'] for row in rows) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,9 +2,7 @@ from typing import Any, Dict, List, Literal, Tuple
 
 import os
 from datetime import datetime
-import pickle
-import numpy as np
-import csv
+import hashlib
 
 import re
 from collections import defaultdict
@@ -16,6 +14,10 @@ from src.Controller.ViewController import ViewController
 from src.Model.DataAnalyser import DataAnalyser
 from src.Model.Digitizer import Digitizer
 from src.Model.Error import Error
+from src.Model.ShootProcessor import ShootProcessor
+from src.Model.AnalysisSettings import AnalysisSettings
+from src.Model.BatchAnalyser import BatchAnalyser
+from src.Model.Stages.StageRegistry import StageRegistry
 
 # This class contains all the different settings of the program and
 # is used as a link between the models and the views
@@ -24,6 +26,7 @@ class Controller():
         self.view_controller = view_controller
         self.model_controller = model_controller
         self.error_handling = Error(self)
+        self.shoot_processor = ShootProcessor()
 
         # Get/Generate parameters
         self.load_parameters_on_open()
@@ -92,8 +95,27 @@ class Controller():
         return self.analyse_parameters["Méthode du calcul d'aire"].get_row()[1]
     def get_LEVELING_METHOD(self) -> str:
         return self.analyse_parameters["Méthode de mise à niveau"].get_row()[1]
+    def get_STD_THRESHOLD(self) -> float:
+        return float(self.analyse_parameters["Seuil de l'écart type (LSB)"].get_row()[1])
+    def get_RANGE_THRESHOLD(self) -> float:
+        return float(self.analyse_parameters["Seuil de l'étendue (LSB)"].get_row()[1])
+    def get_PRECISION(self) -> str:
+        return self.analyse_parameters["Précision des calculs"].get_row()[1]
+    def get_WINDOW_MARGIN(self) -> float:
+        return max(float(self.analyse_parameters["Marge de la fenêtre d'intégration (ns)"].get_row()[1]), 0)
+    def get_DOSE_MODEL(self) -> str:
+        return self.analyse_parameters["Modèle de dose"].get_row()[1]
+    def get_SEGMENTATION_METHOD(self) -> str:
+        return self.analyse_parameters["Séparation des pulses empilés"].get_row()[1]
     def get_DOSE_FACTOR(self) -> float:
         return float(self.analyse_parameters["Facteur de conversion: [nC] --> [cGy]"].get_row()[1])
+    def get_READING_MODE(self) -> str:
+        return self.analyse_parameters["Mode de lecture"].get_row()[1]
+    def get_BLOCK_SIZE(self) -> int:
+        return max(int(self.analyse_parameters["Taille des blocs (pulses)"].get_row()[1]), 1)
+    def get_CACHE_SIZE(self) -> int:
+        # [Mo] --> [octets]
+        return int(float(self.analyse_parameters["Taille du cache (Mo)"].get_row()[1]) * 2**20)
     def get_COARSEGAIN(self) -> float:
         # Maps the according option to its value
         # 10Vpp‐3Vpp‐1Vpp‐0.3Vpp
@@ -109,6 +131,25 @@ class Controller():
         return coarse_map[choice]
     def get_ADC_NBIT(self) -> int:
         return self.ADC_NBIT
+    def get_analysis_settings(self) -> AnalysisSettings:
+        # Copy of the current analysis parameters (for the worker processes)
+        return AnalysisSettings({
+            'RECORD_LENGHT'           : self.get_RECORD_LENGHT(),
+            'AREA_CALCULATION_METHOD' : self.get_AREA_CALCULATION_METHOD(),
+            'LEVELING_METHOD'         : self.get_LEVELING_METHOD(),
+            'WINDOW_MARGIN'           : self.get_WINDOW_MARGIN(),
+            'STD_THRESHOLD'           : self.get_STD_THRESHOLD(),
+            'RANGE_THRESHOLD'         : self.get_RANGE_THRESHOLD(),
+            'PRECISION'               : self.get_PRECISION(),
+            'DOSE_MODEL'              : self.get_DOSE_MODEL(),
+            'SEGMENTATION_METHOD'     : self.get_SEGMENTATION_METHOD(),
+            'DOSE_FACTOR'             : self.get_DOSE_FACTOR(),
+            'READING_MODE'            : self.get_READING_MODE(),
+            'BLOCK_SIZE'              : self.get_BLOCK_SIZE(),
+            'CACHE_SIZE'              : self.get_CACHE_SIZE(),
+            'COARSEGAIN'              : self.get_COARSEGAIN(),
+            'ADC_NBIT'                : self.get_ADC_NBIT(),
+        })
     
     """ Functions for changing parameters """
     def _set_parameter(self, name:str, action:str, *args):
@@ -128,6 +169,10 @@ class Controller():
     
     def get_dig_parameters(self) -> Dict[str, "Parameter"]:
         return self.input_parameters | self.discr_parameters | self.trapezoid_parameters
+    def get_parameters_hash(self) -> bytes:
+        # Identifies the parameters used for a shoot (saved in the header of the raw data)
+        txt = '\n'.join(par.extract_parameter() for param_dict in self.parameters_tuple for par in param_dict.values())
+        return hashlib.sha256(txt.encode()).digest()
     
     """Functions for saving files"""
     def create_instance_directory(self):
@@ -189,47 +234,40 @@ class Controller():
         except Exception as e:
             self.send_feedback("failed saving feedback")
             self.send_feedback(e.__str__())
-    def save_raw_data(self, all_detect, channel:str):
-        file_name = f"{self.incremented_name}_{channel}.dat"
-        path = os.path.join(self.path_of_shoot, file_name)
-        try:
-            with open(path, 'wb') as file:
-                for element in all_detect:
-                    pickle.dump(element, file)
-        except Exception as e:
-            self.send_feedback('failed saving raw data')
-            self.send_feedback(e.__str__())
-    def save_to_csv(self, pulses, channel):
-        file_name = f"{self.incremented_name}_{channel}-DETECTED.csv"
-        path = os.path.join(self.path_of_shoot, file_name)
+    """Function for analysing every shoot of a project"""
+    def batch_analyse(self):
+        project_path = filedialog.askdirectory(
+            title="Select the project (or session) to analyse",
+            initialdir=self.project_path,
+        )
+        if not project_path:
+            self.send_feedback("Please select a folder")
+            return
+        
+        batch_analyser = BatchAnalyser()
+        paths = batch_analyser.find_shoots(project_path)
+        if not paths:
+            self.send_feedback(f"No shoot found in '{project_path}'")
+            return
+        self.send_feedback(f"Analysing {len(paths)} files with {min(batch_analyser.pool.workers, len(paths))} processes...")
+        
+        start = datetime.now()
+        def progress(row):
+            if row['error']:
+                self.send_feedback(f"{row['file']}: {row['error']}")
+            else:
+                self.send_feedback(f"{row['file']}: {row['pulses']} pulses, {row['total_dose']:.4g} cGy")
+            self.view_controller.update_idletasks()
+        rows = batch_analyser.analyse(paths, self.get_analysis_settings(), progress)
+        
+        file_name = f"batch_summary_{start:%d-%m-%Y_%H-%M-%S}.csv"
+        path = os.path.join(project_path, file_name)
         try:
-            writter = csv.writer(open(path, 'w', newline=''))
-            writter.writerow(pulses[0])
-            for pulse in pulses[1:]:
-                #print(pulse)
-                channel = pulse[0]
-                flag = pulse[1]
-                waveform = pulse[2]
-                samples = pulse[3].tolist()
-                list = [channel, flag, waveform, samples]
-                
-                writter.writerow(list)
-        except Exception as e:
-            self.send_feedback('failed csv save')
+            batch_analyser.write_summary(rows, path)
+            self.send_feedback(f"Batch analysis done in {(datetime.now() - start).total_seconds():.1f} s. Summary saved at '{path}'")
+        except IOError as e:
+            self.send_feedback('failed saving batch summary')
             self.send_feedback(e.__str__())
-    def triage_data(self, channel_pulses, channel):
-        pulses = []
-        pulses.append(['Channel', 'Flag', 'Waveform_size', 'Samples'])
-        
-        # Extract samples only
-        for new_pulse in channel_pulses:
-            # Clean data
-            form = np.reshape(new_pulse[3].copy(), (1, int(new_pulse[-2])))
-            clean = self.get_data_analyser().clean_data(form)
-            if not len(clean) == 0: # Select only pulses
-                pulses.append(new_pulse)
-        self.save_to_csv(pulses, channel)
-        return pulses[1:]
     
     """Function for when data has been collected"""
     def post_acquisition(self, all_detect):
@@ -237,23 +275,24 @@ class Controller():
         all_detect: contient toute les pulses pris par le digitizer
         [[
             channel.copy(), flags.copy(), 
-            waveform_size.copy(), analog_probe_1.copy()
+            waveform_size.copy(), analog_probe_1.copy(),
+            timestamp.copy()
         ], ...]
         """
         # Divide for each channel
         CH0 = []
         CH1 = []
         
-        self.send_feedback("Saving raw data as .dat file...")
-        # Save raw data for debugging 
+        self.send_feedback("Dividing the pulses by channel...")
         for read in all_detect:
             #self.send_feedback(read)
             channel = str(read[0])
             flag = str(read[1])
             waveform_size = str(read[2])
             samples = read[3].copy()
+            timestamp = str(read[4])
             
-            struct = [channel, flag, waveform_size, samples]
+            struct = [channel, flag, waveform_size, samples, timestamp]
             
             if struct[0] == '0': # CH0
                 CH0.append(struct)
@@ -263,46 +302,28 @@ class Controller():
                 self.send_feedback("Pulse was not in CH0 or CH1?!")
                 self.send_feedback(read)
         
-        #print('CH0 before triage')
-        #print(CH0)
-        #print(CH1)
-        
-        self.save_raw_data(CH0.copy(), 'CH0')
-        self.save_raw_data(CH1.copy(), 'CH1')
-        
-        self.send_feedback("Selecting valid pulses...")
-        # Parse through data to find pulses + save to csv
-        self.triage_data(CH0.copy(), 'CH0')
-        self.triage_data(CH1.copy(), 'CH1')
-        
-        #print('CH) after triage')
-        #print(CH0)
-        
         # Change dedicated graphs and lists
-        try:
-            self.send_feedback("Analysing CH0 pulses...")
-            self.model_controller.analyse_data(
-                self.view_controller.graph_showcase_ch0,
-                self.get_ch0_analyser(),
-                CH0
-            )
-        except IndexError: # There's no CH0 pulses
-            self.send_feedback("There's no CH0 pulses!")
-        except Exception as e:
-            self.send_feedback(f"Unexpected error while saving CH0 ({e.__str__()}). Stopping program")
-            raise e 
+        graphs = {
+            'CH0': (self.view_controller.graph_showcase_ch0, self.get_ch0_analyser()),
+            'CH1': (self.view_controller.graph_showcase_ch1, self.get_ch1_analyser()),
+        }
+        def show_channel(result:Dict[str, Any]):
+            channel = result['channel']
+            for message in result['feedback']:
+                self.send_feedback(message)
+            if result['results'] is None:
+                self.send_feedback(f"There's no {channel} pulses!")
+                return
+            self.model_controller.show_results(*graphs[channel], result['results'])
         
-        try: 
-            self.send_feedback("Analysing CH1 pulses...")
-            self.model_controller.analyse_data(
-                self.view_controller.graph_showcase_ch1,
-                self.get_ch1_analyser(),
-                CH1
-            )
-        except IndexError: # There's no CH0 pulses
-            self.send_feedback("There's no CH1 pulses!")
+        # Save raw data, select the valid pulses (saved as csv) and analyse them, both channels at the same time
+        self.send_feedback("Saving, selecting and analysing the pulses of CH0 and CH1...")
+        try:
+            self.shoot_processor.process(
+                {'CH0': CH0, 'CH1': CH1}, self.get_analysis_settings(), self.path_of_shoot,
+                self.incremented_name, self.get_parameters_hash(), show_channel)
         except Exception as e:
-            self.send_feedback(f"Unexpected error while saving CH1 ({e.__str__()}). Stopping program")
+            self.send_feedback(f"Unexpected error while saving or analysing the pulses ({e.__str__()}). Stopping program")
             raise e
         
         # Save shoot parameters
@@ -391,13 +412,33 @@ class Controller():
             
         } """
         # Tab -1 : Analyse
+        # The choices of the stages of the analysis are the registered ones (see StageRegistry)
+        stages = StageRegistry()
         self.analyse_parameters = {
             "Méthode du calcul d'aire": Parameter(
-                "Méthode du calcul d'aire", 'trap', "'trap': Utilise la méthode des trapèzes\n'approx-HRM': Somme de toutes les points multipliée par dt (High Resolution Method)",
-                type='FLASHy', widget_type='combobox', choices=('trap', 'approx-HRM')),
+                "Méthode du calcul d'aire", 'trap', stages.describe('integrator'),
+                type='FLASHy', widget_type='combobox', choices=stages.names('integrator')),
             "Méthode de mise à niveau": Parameter(
-                "Méthode de mise à niveau", 'dynamic-median', "'median': Prend les 200 premiers points et utilise sa médianne pour mettre à zéro\n'dynamic-median': Calcule la dérivée du pulse pour trouver le début et la fin du pulse. Trouve la médianne des points hors-pulse et l'utilise pour mettre à zéro.\n'dynamic-mean':  Calcule la dérivée du pulse pour trouver le début et la fin du pulse. Trouve la moyenne des points hors-pulse et l'utilise pour mettre à zéro.",
-                type='FLASHy', widget_type='combobox', choices=("median", "dynamic-mean", "dynamic-median")),
+                "Méthode de mise à niveau", 'dynamic-median', stages.describe('leveler'),
+                type='FLASHy', widget_type='combobox', choices=stages.names('leveler')),
+            "Marge de la fenêtre d'intégration (ns)": Parameter(
+                "Marge de la fenêtre d'intégration (ns)", '200', "Temps intégré avant le début et après la fin du pulse par les méthodes du calcul d'aire qui n'intègrent que le pulse ('trap-window')",
+                type='FLASHy', widget_type='entry', valide_range=(0, 1000000)),
+            "Seuil de l'écart type (LSB)": Parameter(
+                "Seuil de l'écart type (LSB)", '10', "Les enregistrements dont l'écart type est plus petit sont vides (pas de pulse) et ne sont pas analysés",
+                type='FLASHy', widget_type='entry', valide_range=(0, 16384)),
+            "Seuil de l'étendue (LSB)": Parameter(
+                "Seuil de l'étendue (LSB)", '10', "Les enregistrements dont l'étendue (max - min) est plus petite sont vides (pas de pulse) et ne sont pas analysés.\nCalculée d'abord sur un point sur 16 pour rejeter rapidement les enregistrements vides",
+                type='FLASHy', widget_type='entry', valide_range=(0, 16384)),
+            "Précision des calculs": Parameter(
+                "Précision des calculs", 'float32', "Précision des pulses mis à niveau (les données restent en int16 et les sommes sont faites en float64)\n'float64': Double précision\n'float32': Deux fois moins de mémoire pour les pulses mis à niveau, l'erreur sur la dose totale est négligeable",
+                type='FLASHy', widget_type='combobox', choices=('float64', 'float32')),
+            "Modèle de dose": Parameter(
+                "Modèle de dose", 'linear', stages.describe('dose'),
+                type='FLASHy', widget_type='combobox', choices=stages.names('dose')),
+            "Séparation des pulses empilés": Parameter(
+                "Séparation des pulses empilés", 'record', stages.describe('segmenter'),
+                type='FLASHy', widget_type='combobox', choices=stages.names('segmenter')),
             "Graphique 1": Parameter(
                 "Graphique 1", "Pulse", "Choix pour ce que le grahique 1 montre\nPulse: Affiche le voltage (en V) de chaque pulse selon le temps (en µs)\nAire: Affiche l'aire sous la courbe du pulse correspondant (en nC)",
                 type='FLASHy', widget_type='combobox', choices=('Pulse', 'Aire')),
@@ -410,6 +451,15 @@ class Controller():
             "Facteur de conversion: [nC] --> [cGy]": Parameter(
                 "Facteur de conversion: [nC] --> [cGy]", '2', "Permet de passer de nC à cGy\nRemarque: Malgré le fait que les graphiques ne sont pas affichés avec ces unités, le facteur de conversion doit respecter l'équation",
                 type='FLASHy', widget_type='entry'),
+            "Mode de lecture": Parameter(
+                "Mode de lecture", 'complet', "'complet': Lit tout le fichier avant de l'analyser\n'par blocs': Lit et analyse le fichier un bloc de pulses à la fois. La mémoire utilisée ne dépend plus de la taille du fichier (seul le dernier bloc est affiché dans le graphique des pulses)",
+                type='FLASHy', widget_type='combobox', choices=('complet', 'par blocs')),
+            "Taille des blocs (pulses)": Parameter(
+                "Taille des blocs (pulses)", '4096', "Nombre de pulses lus et analysés à la fois en mode 'par blocs'",
+                type='FLASHy', widget_type='entry', valide_range=(1, 1000000)),
+            "Taille du cache (Mo)": Parameter(
+                "Taille du cache (Mo)", '2048', "Les fichiers déjà lus sont gardés dans le dossier de cache de l'utilisateur (~/.cache/FLASHy sous Linux) pour être réouverts sans être relus.\nLes fichiers utilisés le moins récemment sont retirés quand le cache dépasse cette taille\n0: Désactive le cache",
+                type='FLASHy', widget_type='entry', valide_range=(0, 1000000)),
         }
 
         self.parameters_tuple = (self.input_parameters, self.discr_parameters, self.trapezoid_parameters, self.analyse_parameters)
@@ -533,6 +583,16 @@ class Controller():
                         type=param['type'], dig_name=param['dig_name'], widget_type=param['widget_type'], 
                         choices=param['choices'], valide_range=param['valide_range']
                     )
+            
+            # Parameters added since the file was saved take their default value
+            self.generate_default_parameters()
+            for loaded_par, default_par in zip((input_par, discr_par, trap_par, analyse_par), self.parameters_tuple):
+                for name, parameter in default_par.items():
+                    loaded_par.setdefault(name, parameter)
+            # The stages registered since the file was saved are added to the choices
+            for name in ("Méthode du calcul d'aire", "Méthode de mise à niveau", "Modèle de dose", "Séparation des pulses empilés"):
+                analyse_par[name].set_choices(self.analyse_parameters[name].get_choices())
+                analyse_par[name].set_description(self.analyse_parameters[name].get_description())
                     
             self.input_parameters     = input_par
             self.discr_parameters     = discr_par
@@ -663,6 +723,8 @@ class Parameter:
         return self.name
     def get_description(self) -> str:
         return self.description
+    def set_description(self, description:str):
+        self.description = description
     def set_choices(self, choices:tuple[str, ...]):
         self.choices = choices
     def get_choices(self) -> tuple[str, ...] | None:
@@ -39,8 +39,26 @@ class ModelController():
         return self.controller.get_AREA_CALCULATION_METHOD()
     def get_LEVELING_METHOD(self):
         return self.controller.get_LEVELING_METHOD()
+    def get_STD_THRESHOLD(self):
+        return self.controller.get_STD_THRESHOLD()
+    def get_RANGE_THRESHOLD(self):
+        return self.controller.get_RANGE_THRESHOLD()
+    def get_PRECISION(self):
+        return self.controller.get_PRECISION()
+    def get_WINDOW_MARGIN(self):
+        return self.controller.get_WINDOW_MARGIN()
+    def get_DOSE_MODEL(self):
+        return self.controller.get_DOSE_MODEL()
+    def get_SEGMENTATION_METHOD(self):
+        return self.controller.get_SEGMENTATION_METHOD()
     def get_dose_factor(self):
         return self.controller.get_DOSE_FACTOR()
+    def get_READING_MODE(self):
+        return self.controller.get_READING_MODE()
+    def get_BLOCK_SIZE(self):
+        return self.controller.get_BLOCK_SIZE()
+    def get_CACHE_SIZE(self):
+        return self.controller.get_CACHE_SIZE()
     def get_COARSEGAIN(self):
         return self.controller.get_COARSEGAIN()
     def get_ADC_NBIT(self):
@@ -61,4 +79,8 @@ class ModelController():
     
     """Functions for updating the graph showcases"""    
     def analyse_data(self, graph_showcase:"GraphShowcase", analyser:DataAnalyser, data):
-        analyser.analyse_data(graph_showcase, data)
\ No newline at end of file
+        analyser.analyse_data(graph_showcase, data)
+    def show_results(self, graph_showcase:"GraphShowcase", analyser:DataAnalyser, results:Dict[str, Any]):
+        # Results of an analysis done in a worker process (see ShootProcessor)
+        analyser.set_results(results)
+        analyser.show(graph_showcase)
\ No newline at end of file
@@ -205,6 +205,9 @@ class ViewController(tk.Tk):
         self.file_selection_raw.select_file()
         self.file_selection_raw.analyse_data_thread()
         
+    def call_batch_analyse(self):
+        self.controller.batch_analyse()
+        
     def call_mesure(self):
         if not self.controller.isRECORDING:
             self.bypass.data_aqc_panel.record_button.start_recording()
@@ -0,0 +1,271 @@
+import time
+import numpy as np
+
+from src.Model.Stages.Stage import Stage
+from src.Model.Stages.Leveler import Leveler
+from src.Model.Stages.Integrator import Integrator
+from src.Model.Stages.DoseModel import DoseModel
+from src.Model.Stages.Segmenter import Segmenter
+from src.Model.Stages.StageRegistry import StageRegistry
+
+from typing import TYPE_CHECKING, Dict, List, Tuple
+if TYPE_CHECKING:
+    from src.Controller.ModelController import ModelController
+
+# Size of the float64 work arrays of a block. Small enough for the block to stay in
+# the CPU cache between the steps of the analysis
+BLOCK_BYTES = 1 << 20
+# Samples of the record used by the pre-screen of the empty records (one every SCREEN_STEP)
+SCREEN_STEP = 16
+# One line per pulse found: its record (row of the samples) and its window [start, end[ (samples kept)
+PULSES_DTYPE = np.dtype([('record', np.int64), ('start', np.int64), ('end', np.int64)])
+
+
+# Analyses the raw (int16) pulses: validity, baseline, area and dose of each pulse.
+# The pulses are taken a block of rows at a time and every step is done on the block
+# before going to the next one, so the temporaries are the size of a block and not
+# the size of the whole shoot.
+class AnalysisEngine:
+    def __init__(self, model_controller:"ModelController", block_bytes:int=BLOCK_BYTES):
+        self.model_controller = model_controller
+        self.block_bytes = block_bytes
+        # The thresholds of the cleaning (standard deviation and range, in LSB) are in the Analyse parameters
+        self.screen_step = SCREEN_STEP
+        # Records rejected by the last cleaning: {'records': ..., 'screen': ..., 'std': ...}, see is_valid
+        self.rejected:Dict[str, int] = {}
+        # Leveler, integrator and dose model (chosen by name in the Analyse parameters)
+        self.stages = StageRegistry()
+
+    def block_rows(self, n_samples:int) -> int:
+        return max(self.block_bytes // (8 * max(n_samples, 1)), 1)
+
+    def selected_stages(self) -> Dict[str, Stage]:
+        # Stages chosen in the Analyse parameters
+        return {
+            'leveler'    : self.stages.get('leveler', self.model_controller.get_LEVELING_METHOD()),
+            'integrator' : self.stages.get('integrator', self.model_controller.get_AREA_CALCULATION_METHOD()),
+            'dose'       : self.stages.get('dose', self.model_controller.get_DOSE_MODEL()),
+            'segmenter'  : self.stages.get('segmenter', self.model_controller.get_SEGMENTATION_METHOD()),
+        }
+
+    def stage_keys(self, repeat:int, dt:float, convertion_factor:float,
+                   stages:Dict[str, Stage]|None=None) -> Dict[str, tuple]:
+        """
+        The parameters each output of the analysis depends on. The key of an output contains
+        the key of the output it's calculated from, so when a parameter changes only the
+        outputs after it have a different key (the dose factor only changes DOSE).
+        """
+        stages = stages or self.selected_stages()
+        keys:Dict[str, tuple] = {}
+        keys['VALID']    = self.thresholds() + (self.screen_step,)
+        keys['BASELINE'] = keys['VALID'] + (stages['leveler'].name, repeat)
+        keys['AREA']     = keys['BASELINE'] + (stages['integrator'].name, self.lsb2v_factor(), dt, convertion_factor,
+                                               self.window_margin(dt), self.working_dtype(), stages['segmenter'].name)
+        keys['PULSES']   = keys['AREA']
+        keys['DOSE']     = keys['AREA'] + (stages['dose'].name, self.model_controller.get_dose_factor())
+        return keys
+
+    def analyse(self, samples:np.ndarray, repeat:int, dt:float, convertion_factor:float,
+                stages:Dict[str, Stage]|None=None, timings:Dict[str, float]|None=None,
+                reuse:Dict[str, np.ndarray]|None=None) -> Dict[str, np.ndarray]:
+        """
+        samples: raw pulses (one per row), every sample of the record saved repeat times is only there once
+        dt: spacing between the samples (µs), convertion_factor: [V*s] --> [C]
+        stages: leveler, integrator and dose model to use (the selected ones by default)
+        timings: if given, the time spent in each stage is added to it (s)
+        reuse: outputs of a last analysis of the same samples that are still right (see stage_keys),
+               the stages giving them are skipped
+        Returns VALID and BASELINE (for every pulse and the valid ones), and the table of the
+        pulses found in the valid records (PULSES, see PULSES_DTYPE) with their AREA and DOSE.
+        Without pile-up splitting (see Segmenter), there's one pulse per valid record.
+        """
+        stages = stages or self.selected_stages()
+        leveler:Leveler = stages['leveler']
+        integrator:Integrator = stages['integrator']
+        dose_model:DoseModel = stages['dose']
+        segmenter:Segmenter = stages['segmenter']
+        timings = timings if timings is not None else {}
+        reuse = reuse or {}
+        lsb2v = self.lsb2v_factor()
+        dose_factor:float = self.model_controller.get_dose_factor()
+        margin = self.window_margin(dt)
+        work = self.working_dtype()
+        scale = self.area_scale(lsb2v, dt, convertion_factor)
+
+        if all(name in reuse for name in ('VALID', 'BASELINE', 'PULSES', 'AREA')):
+            # Only the dose is left, the pulses are not read again
+            lap = time.perf_counter()
+            dose = dose_model.dose(reuse['AREA'], dose_factor)
+            self.add_time(timings, 'dose', lap)
+            return {'VALID': reuse['VALID'], 'BASELINE': reuse['BASELINE'], 'PULSES': reuse['PULSES'],
+                    'AREA': reuse['AREA'], 'DOSE': dose}
+
+        n_pulses = len(samples)
+        valid = reuse['VALID'] if 'VALID' in reuse else np.zeros(n_pulses, dtype=bool)
+        if 'VALID' not in reuse:
+            self.rejected = {}
+        # Index of the first valid pulse of the block in BASELINE
+        first = 0
+        baselines = []
+        tables = []
+        areas = []
+        doses = []
+        rows = self.block_rows(samples.shape[1] if samples.ndim == 2 else 0)
+        for start in range(0, n_pulses, rows):
+            block = np.asarray(samples[start:start + rows])
+            # Remove flat with noise data
+            if 'VALID' in reuse:
+                block_valid = valid[start:start + rows]
+            else:
+                block_valid = self.is_valid(block, self.rejected)
+                valid[start:start + rows] = block_valid
+            records = start + np.flatnonzero(block_valid)
+            block = block[block_valid]
+            if len(block) == 0:
+                continue
+
+            lap = time.perf_counter()
+            window = None
+            uses_window = integrator.uses_window and not segmenter.splits
+            if 'BASELINE' in reuse:
+                baseline = reuse['BASELINE'][first:first + len(block)]
+                if uses_window:
+                    window = leveler.window(block, repeat)
+            elif uses_window:
+                baseline, window = leveler.baseline_and_window(block, repeat)
+            else:
+                baseline = leveler.baseline(block, repeat)
+            first += len(block)
+            if window is not None:
+                # The margin is integrated on both sides of the pulse
+                window = (np.maximum(window[0] - margin, 0), np.minimum(window[1] + margin, block.shape[1]))
+            pulse_records = None
+            area_baseline = baseline
+            if segmenter.splits:
+                # Every pulse of each record, integrated on its window with the margin
+                lap = self.add_time(timings, 'leveler', lap)
+                pulse_records, pulse_start, pulse_end = segmenter.segment(block, baseline, repeat)
+                window = segmenter.widen(pulse_records, pulse_start, pulse_end, margin, block.shape[1])
+                area_baseline = baseline[pulse_records]
+                lap = self.add_time(timings, 'segmenter', lap)
+            if integrator.uses_counts and leveler.linear:
+                # Exact sums of the raw counts, one scale for LSB * samples --> nC
+                lap = self.add_time(timings, 'leveler', lap)
+                area = integrator.area_counts(block, area_baseline, repeat, window, pulse_records)
+                area *= scale
+            else:
+                # The pulses are not in V but in LSB (see documentation for details)
+                pulses = leveler.level(block, baseline, lsb2v, work)
+                lap = self.add_time(timings, 'leveler', lap)
+                area = self.convert_Vs2nC(integrator.area(pulses, repeat, dt, window, pulse_records), convertion_factor)
+            lap = self.add_time(timings, 'integrator', lap)
+            doses.append(dose_model.dose(area, dose_factor))
+            self.add_time(timings, 'dose', lap)
+            baselines.append(baseline)
+            areas.append(area)
+            if pulse_records is None:
+                # One pulse per record, on the window integrated
+                pulse_records = records
+                if window is None:
+                    window = segmenter.segment(block, baseline, repeat)[1:]
+            else:
+                pulse_records = records[pulse_records]
+            table = np.empty(len(pulse_records), dtype=PULSES_DTYPE)
+            table['record'] = pulse_records
+            table['start'], table['end'] = window
+            tables.append(table)
+
+        return {
+            'VALID'    : valid,
+            'BASELINE' : np.concatenate(baselines) if baselines else np.zeros(0),
+            'PULSES'   : np.concatenate(tables) if tables else np.zeros(0, dtype=PULSES_DTYPE),
+            'AREA'     : np.concatenate(areas) if areas else np.zeros(0),
+            'DOSE'     : np.concatenate(doses) if doses else np.zeros(0),
+        }
+
+    def add_time(self, timings:Dict[str, float], kind:str, lap:float) -> float:
+        now = time.perf_counter()
+        timings[kind] = timings.get(kind, 0.0) + now - lap
+        return now
+
+    def benchmark(self, samples:np.ndarray, repeat:int, dt:float, convertion_factor:float, rounds:int=3) -> List[Dict]:
+        """
+        Runs every registered stage on the same pulses, in place of the selected stage of its
+        kind (the other ones stay the selected ones). Returns one row per stage with the best
+        time of rounds and the total dose it gives.
+        """
+        selected = self.selected_stages()
+        rows = []
+        for kind in selected:
+            for stage in self.stages.all(kind):
+                best = np.inf
+                for _ in range(rounds):
+                    timings:Dict[str, float] = {}
+                    results = self.analyse(samples, repeat, dt, convertion_factor, selected | {kind: stage}, timings)
+                    best = min(best, timings.get(kind, 0.0))
+                rows.append({
+                    'stage'      : kind,
+                    'name'       : stage.name,
+                    'selected'   : stage is selected[kind],
+                    'time'       : best,
+                    'pulses'     : len(results['DOSE']),
+                    'total_dose' : float(np.nansum(results['DOSE'])),
+                })
+        return rows
+
+    def working_dtype(self) -> np.dtype:
+        # Precision of the leveled pulses: the raw pulses stay int16 and the sums are done in float64
+        return np.dtype(self.model_controller.get_PRECISION())
+
+    def window_margin(self, dt:float) -> int:
+        # Margin around the window of the pulses, [ns] --> samples kept (dt in µs)
+        margin:float = self.model_controller.get_WINDOW_MARGIN()
+        return int(np.ceil(margin * 0.001 / dt)) if dt > 0 else 0
+
+    def lsb2v_factor(self) -> float:
+        coarse_gain:float = self.model_controller.get_COARSEGAIN()
+        adc_n_bits:int = self.model_controller.get_ADC_NBIT()
+        return coarse_gain / (2 ** adc_n_bits)
+
+    def thresholds(self) -> Tuple[float, float]:
+        return self.model_controller.get_STD_THRESHOLD(), self.model_controller.get_RANGE_THRESHOLD()
+
+    def is_valid(self, data:np.ndarray, rejected:Dict[str, int]|None=None) -> np.ndarray:
+        """
+        The goal is to remove the data that doesn't have pulses
+        Using range and standard deviation, in two tiers: most of the records of the software
+        trigger are empty, the range of one sample every screen_step (integers, no copy) rejects
+        them. The range of the samples skipped can only be larger, so the records kept have the
+        range and only the standard deviation (float64, many passes) is left to calculate for them.
+        A spike narrower than screen_step samples can be missed, it isn't a pulse.
+        rejected: if given, the number of records rejected by each tier is added to it
+        """
+        if data.ndim != 2 or data.shape[1] == 0:
+            return np.zeros(len(data), dtype=bool)
+        std_thres, range_thres = self.thresholds()
+        valid = np.ptp(data[:, ::self.screen_step], axis=1) > range_thres
+        survivors = np.flatnonzero(valid)
+        valid[survivors] = np.std(data[survivors], axis=1) > std_thres
+        if rejected is not None:
+            rejected['records'] = rejected.get('records', 0) + len(data)
+            rejected['screen'] = rejected.get('screen', 0) + len(data) - len(survivors)
+            rejected['std'] = rejected.get('std', 0) + len(survivors) - int(np.count_nonzero(valid))
+        return valid
+
+    """ Leveling """
+    def level(self, block:np.ndarray, baseline:np.ndarray, choice:str, lsb2v:float) -> np.ndarray:
+        return self.stages.get('leveler', choice).level(block, baseline, lsb2v, self.working_dtype())
+
+    """ Integration """
+    def area_scale(self, lsb2v:float, dt:float, convertion_factor:float) -> float:
+        # [LSB * samples] --> [V*µs] --> [nC] in one factor (see convert_Vs2nC)
+        return lsb2v * dt * (1e6**2) * convertion_factor * 1e-9
+
+    def convert_Vs2nC(self, area:np.ndarray, convertion_factor:float) -> np.ndarray:
+        # [V*µs] --> [V*s]
+        area *= (1e6**2)
+        # [V*s] --> [C]
+        area *= convertion_factor
+        # [C] --> [nC]
+        area *= 1e-9
+        return area
@@ -0,0 +1,46 @@
+from typing import Any, Dict, List
+
+
+# The analysis parameters of the Controller, without the Controller.
+# It has the same getters as the ModelController so a DataAnalyser can be used
+# without any view (worker processes, command line), and it can be pickled.
+class AnalysisSettings:
+    def __init__(self, values:Dict[str, Any]):
+        # {'RECORD_LENGHT': '15000', 'LEVELING_METHOD': 'dynamic-median', ...}
+        self.values = dict(values)
+        # Feedback of the DataAnalyser, there's no view to send it to
+        self.feedback:List[str] = []
+    
+    def get_rcd_len(self):
+        return self.values['RECORD_LENGHT']
+    def get_AREA_CALCULATION_METHOD(self):
+        return self.values['AREA_CALCULATION_METHOD']
+    def get_LEVELING_METHOD(self):
+        return self.values['LEVELING_METHOD']
+    def get_STD_THRESHOLD(self):
+        return self.values['STD_THRESHOLD']
+    def get_RANGE_THRESHOLD(self):
+        return self.values['RANGE_THRESHOLD']
+    def get_PRECISION(self):
+        return self.values['PRECISION']
+    def get_WINDOW_MARGIN(self):
+        return self.values['WINDOW_MARGIN']
+    def get_DOSE_MODEL(self):
+        return self.values['DOSE_MODEL']
+    def get_SEGMENTATION_METHOD(self):
+        return self.values['SEGMENTATION_METHOD']
+    def get_dose_factor(self):
+        return self.values['DOSE_FACTOR']
+    def get_READING_MODE(self):
+        return self.values['READING_MODE']
+    def get_BLOCK_SIZE(self):
+        return self.values['BLOCK_SIZE']
+    def get_CACHE_SIZE(self):
+        return self.values['CACHE_SIZE']
+    def get_COARSEGAIN(self):
+        return self.values['COARSEGAIN']
+    def get_ADC_NBIT(self):
+        return self.values['ADC_NBIT']
+    
+    def send_feedback(self, message:str):
+        self.feedback.append(message)
@@ -0,0 +1,126 @@
+import os
+import csv
+import time
+import numpy as np
+
+from src.Model.AnalysisSettings import AnalysisSettings
+from src.Model.DataAnalyser import DataAnalyser
+from src.Model.Readers.FormatRegistry import FormatRegistry
+from src.Model.WorkerPool import WorkerPool
+
+from typing import Any, Callable, Dict, List, TextIO
+
+# Columns of the summary
+SUMMARY_HEADER = ('shoot', 'file', 'format', 'records', 'rejected', 'pulses', 'total_area', 'total_dose',
+                  'dose_mean', 'dose_std', 'dose_median', 'frequency', 'dose_rate', 'read_time', 'analysis_time', 'error')
+
+
+def analyse_shoot(path:str, settings:AnalysisSettings, keep_pulses:bool=False) -> Dict[str, Any]:
+    """
+    Analyses one file and returns its line of the summary (with the record, window,
+    area and dose of every pulse if keep_pulses).
+    Module level function so it can be sent to the worker processes (see WorkerPool).
+    """
+    analyser = DataAnalyser(settings)
+    # One file per process, the readers must not start their own processes
+    analyser.formats = FormatRegistry(workers=1)
+    row:Dict[str, Any] = {
+        'shoot'         : os.path.basename(os.path.dirname(path)),
+        'file'          : path,
+        'format'        : '',
+        'records'       : 0,
+        'rejected'      : 0,
+        'pulses'        : 0,
+        'total_area'    : 0.0,
+        'total_dose'    : 0.0,
+        'dose_mean'     : '',
+        'dose_std'      : '',
+        'dose_median'   : '',
+        'frequency'     : '',
+        'dose_rate'     : '',
+        'read_time'     : 0.0,
+        'analysis_time' : 0.0,
+        'error'         : '',
+    }
+    try:
+        reader = analyser.formats.detect(path)
+        row['format'] = reader.name if reader is not None else ''
+        start = time.perf_counter()
+        if settings.get_READING_MODE() == 'par blocs':
+            # Reading and analysis are done together
+            ok = analyser.stream_file(path)
+            row['analysis_time'] = time.perf_counter() - start
+        else:
+            ok = analyser.read_file(path)
+            row['read_time'] = time.perf_counter() - start
+            if ok:
+                start = time.perf_counter()
+                analyser.analyse_pulses()
+                row['analysis_time'] = time.perf_counter() - start
+        if ok:
+            # Records read and rejected by the cleaning (empty triggers)
+            row['records'] = analyser.rejected.get('records', 0)
+            row['rejected'] = analyser.rejected.get('screen', 0) + analyser.rejected.get('std', 0)
+            row['pulses'] = int(analyser.nbr_of_pulse)
+            row['total_area'] = float(analyser.total_area)
+            row['total_dose'] = float(analyser.total_dose)
+            statistics = analyser.dose_statistics.summary()
+            row['dose_mean'] = statistics['mean']
+            row['dose_std'] = statistics['std']
+            # The doses of every pulse are kept, their median is exact (the one of the statistics is within RELATIVE_ACCURACY)
+            row['dose_median'] = float(np.nanmedian(analyser.dose)) if len(analyser.dose) else statistics['median']
+            time_index = analyser.get_time_index()
+            if time_index is not None: # Repetition frequency (Hz) and mean dose rate (cGy/s) of the shoot
+                row['frequency'] = time_index.frequency()
+                row['dose_rate'] = time_index.mean_dose_rate()
+            if keep_pulses:
+                # Record of each pulse and its window (samples kept)
+                row['pulse_records'] = analyser.pulses['record'].tolist()
+                row['starts'] = analyser.pulses['start'].tolist()
+                row['ends'] = analyser.pulses['end'].tolist()
+                row['areas'] = analyser.area_under_curve.tolist()
+                row['doses'] = analyser.dose.tolist()
+        else: # Last message of the analyser (unknown format, no data, ...)
+            row['error'] = settings.feedback[-1] if settings.feedback else "Not analysed"
+    except Exception as e:
+        row['error'] = f"{type(e).__name__}: {e}"
+    return row
+
+
+# Analyses every shoot of a project (DAQ/open_on_<date>/<name>_<n>/) in parallel
+class BatchAnalyser:
+    def __init__(self, workers:int|None=None):
+        # One file per worker process (None: one per core)
+        self.pool = WorkerPool(workers)
+    
+    def find_shoots(self, project_path:str) -> List[str]:
+        # Files saved by the program after each shoot: <name>_<n>_CHx-DETECTED.csv and <name>_<n>_CHx.dat
+        # Both have the pulses of the same channel, only one of them is analysed: the raw data
+        # (.dat, every record) when it's there, the valid pulses (-DETECTED.csv) otherwise
+        channels:Dict[str, str] = {}
+        for directory, _, files in os.walk(project_path):
+            for name in files:
+                if name.endswith('.dat'):
+                    channels[os.path.join(directory, name[:-len('.dat')])] = os.path.join(directory, name)
+                elif name.endswith('-DETECTED.csv'):
+                    channels.setdefault(os.path.join(directory, name[:-len('-DETECTED.csv')]), os.path.join(directory, name))
+        return sorted(channels.values())
+    
+    def analyse(self, paths:List[str], settings:AnalysisSettings,
+                progress:Callable[[Dict[str, Any]], None]|None=None, keep_pulses:bool=False) -> List[Dict[str, Any]]:
+        """
+        Analyses the files with the same settings, one file per task. 
+        progress is called (in this process) every time a file is done.
+        Returns the lines of the summary, in the same order as paths.
+        """
+        rows = self.pool.run(analyse_shoot, {path: (path, settings, keep_pulses) for path in paths}, progress)
+        return [rows[path] for path in paths]
+    
+    def write_summary(self, rows:List[Dict[str, Any]], path:str):
+        with open(path, 'w', newline='') as f:
+            self.write_csv(rows, f)
+    
+    def write_csv(self, rows:List[Dict[str, Any]], f:TextIO):
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_HEADER, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
@@ -1,19 +1,41 @@
-import csv
+import os
+import mmap
 import numpy as np
-import pickle
 
-from typing import TYPE_CHECKING, Any
+from src.Model.Readers.FormatRegistry import FormatRegistry
+from src.Model.Readers.Reader import Reader
+from src.Model.ParseCache import ParseCache
+from src.Model.AnalysisEngine import AnalysisEngine, PULSES_DTYPE
+from src.Model.StreamingStatistics import StreamingStatistics
+from src.Model.TimeIndex import TimeIndex
+from src.Model.ShootFile import TIMESTAMP_TICK_PS
+
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Tuple
 if TYPE_CHECKING:
     from src.Controller.ModelController import ModelController
     from src.View.GraphShowcase import GraphShowcase
 
 
 class DataAnalyser:
+    # What the analysis of the pulses gives (sent back by the worker processes, see ShootProcessor)
+    RESULTS = ('samples', 'timestamps', 'valid', 'baselines', 'leveling_method', 'SAMPLE_SIZE', 'pulses',
+               'area_under_curve', 'dose', 't_axis', 'dt', 'sample_repeat', 'nbr_of_pulse', 'total_area',
+               'total_dose', 'area_statistics', 'dose_statistics', 'time_index', 'rejected', 'stage_outputs', 'data')
+    
     def __init__(self, model_controller:"ModelController"):
-        # Contains the sample points for each pulse
-        self.pulse_info:np.ndarray = np.arange(25)
+        # Contains the raw sample points for each pulse (as read, before cleaning)
+        self.samples:np.ndarray = np.zeros((0, 0), dtype=np.int16)
+        # Time of each record of samples (int64 ps), None if the file doesn't have it
+        self.timestamps:np.ndarray|None = None
+        # Which pulses of samples are valid (not flat with noise) and their baseline
+        self.valid = np.zeros(0, dtype=bool)
+        self.baselines = np.zeros(0)
+        # Leveling method used for the baselines
+        self.leveling_method:str = 'dynamic-median'
         # Number of points in each pulse
         self.SAMPLE_SIZE:int = 0
+        # Record (row of samples) and window of each pulse, a record can have many pulses (see Segmenter)
+        self.pulses = np.zeros(0, dtype=PULSES_DTYPE)
         # Contains the area of each pulse
         self.area_under_curve = np.arange(25)
         # Contains the dose delivered by each pulse
@@ -22,6 +44,9 @@ class DataAnalyser:
         self.t_axis = np.arange(25)
         # The spacing in ns between each sample point
         self.dt = 0
+        # How many times each sample was repeated in the file (CoMPASS saves every sample twice).
+        # Only one of them is kept, the calculations account for the others
+        self.sample_repeat:int = 1
         # The number of pulse taken
         self.nbr_of_pulse:int = 0
         # Facteur de calibration fourni par le fabricant
@@ -30,231 +55,286 @@ class DataAnalyser:
         self.data = [[]]
         # For accessing the model controller
         self.model_controller = model_controller
+        # Readers of the file formats, chosen from the content of the file
+        self.formats = FormatRegistry()
+        # Decoded files kept on the disk
+        self.parse_cache = ParseCache()
+        # Clean, level, integrate and dose in one pass over the pulses
+        self.engine = AnalysisEngine(model_controller)
+        # Outputs of the stages of the last analysis with the parameters they depend on
+        # {'BASELINE': (key, baselines), ...}, see AnalysisEngine.stage_keys
+        self.stage_outputs:Dict[str, Tuple[tuple, np.ndarray]] = {}
+        # File of the samples (path, size, mtime) when it was read completely
+        self.source:tuple|None = None
+        # Mean, std, min, max and quantiles of the areas and doses, updated block by block
+        self.area_statistics = StreamingStatistics()
+        self.dose_statistics = StreamingStatistics()
+        # Time and dose of each pulse sorted by time (dose rate, frequency), None without timestamps
+        self.time_index:TimeIndex|None = None
+        # Records read and rejected by the cleaning (see AnalysisEngine.is_valid)
+        self.rejected:Dict[str, int] = {}
     
-    def determine_dialect(self, path):
-        with open(path, 'r') as file:
-            first_line = file.readline()
-            file.seek(0)
-            try:
-                dialect = csv.Sniffer().sniff(first_line)
-                return dialect
-            except csv.Error:
-                csv.register_dialect("CoMPASS", delimiter=';')
-                return csv.get_dialect("CoMPASS")
-    
-    def read_csv(self, path:str):
-        info = []
-        dialect = self.determine_dialect(path)
+    def iter_blocks(self, path:str, reader:Reader, n_pulses:int) -> Iterator[Tuple[np.ndarray, np.ndarray|None]]:
+        # Same as read_file, but gives the pulses (without the repeated samples) and their timestamps n_pulses at a time
+        # Files already in the cache are memory-mapped and only sliced
+        if reader.use_cache:
+            self.parse_cache.max_bytes = self.model_controller.get_CACHE_SIZE()
+            columns = self.parse_cache.load(path) or {}
+            if 'SAMPLES' in columns:
+                self.model_controller.send_feedback("File already parsed, using the cache")
+                samples = self.true_rate_samples(columns)
+                timestamps = reader.timestamps(columns)
+                for start in range(0, len(samples), n_pulses):
+                    yield samples[start:start + n_pulses], None if timestamps is None else timestamps[start:start + n_pulses]
+                return
         
-        if dialect.delimiter == ';':
-            self.model_controller.send_feedback("CoMPASS csv detected!")
-            with open(path, newline='') as f:
-                # CoMPASS
-                # ['BOARD;CHANNEL;TIMETAG;ENERGY;CALIB_ENERGY;FLAGS;PROBE_CODE;SAMPLES']
-                reader = csv.reader(f, dialect=dialect)
-                next(f)
-                for row in reader:
-                    # Isolate SAMPLES
-                    row = np.array(row[7:], dtype=int)
-                    info.append(row)
-        elif dialect.delimiter == ',':
-            self.model_controller.send_feedback("FLASHy csv detected!")
-            # FlASHy
-            # ['Channel,Flag,Waveform_size,Samples']
-            with open(path, newline='') as f:
-                reader = csv.reader(f, dialect=dialect)
-                next(f)
-                for row in reader:
-                    # Isolate SAMPLES
-                    samples_str:str = row[-1].replace('[', "").replace(']','')
-                    samples = samples_str.split(",")
-                    row = np.array(samples, dtype=int)
-                    info.append(row)
-        return info
+        for block in reader.iter_blocks(path, n_pulses):
+            yield self.remove_repeated_samples(block['SAMPLES']), reader.timestamps(block)
+    
+    def read_cached(self, path:str, read) -> Dict[str, np.ndarray]:
+        # Parsed files are kept in the cache and memory-mapped the next time
+        self.parse_cache.max_bytes = self.model_controller.get_CACHE_SIZE()
+        columns = self.parse_cache.load(path)
+        if columns is not None:
+            self.model_controller.send_feedback("File already parsed, using the cache")
+            return columns
+        columns = read(path)
+        # The repeated samples are removed before caching (the cache keeps the samples at their true rate)
+        columns['SAMPLES'] = self.remove_repeated_samples(columns['SAMPLES'])
+        columns['SAMPLE_REPEAT'] = np.array(self.sample_repeat)
+        self.parse_cache.store(path, columns)
+        return columns
     
-    def read_raw(self, path:str):
-        info = []
-        file = open(path, 'rb')
-        while True:
-            try:
-                new_pulse = pickle.load(file)
-                info.append(new_pulse[-1])
-            except Exception as e:
-                break
-        file.close()
-        return info
+    def detect_sample_repeat(self, data) -> int:
+        # 787;787;790;790;... --> every sample is saved twice
+        if data.ndim != 2 or data.shape[1] < 2 or data.shape[1] % 2 != 0:
+            return 1
+        # By blocks of pulses, to stop at the first one that isn't repeated (and use less memory)
+        for start in range(0, len(data), 4096):
+            block = data[start:start + 4096]
+            if not np.array_equal(block[:, 0::2], block[:, 1::2]):
+                return 1
+        return 2
+    
+    def remove_repeated_samples(self, data):
+        # Keep the waveform at its true rate
+        self.sample_repeat = self.detect_sample_repeat(data)
+        if self.sample_repeat == 1:
+            return data
+        if self.is_memory_mapped(data):
+            # Still not read, the view only reads the samples kept
+            return data[:, ::self.sample_repeat]
+        # A copy, so the matrix with the repeated samples can be freed
+        return np.ascontiguousarray(data[:, ::self.sample_repeat])
+    
+    def true_rate_samples(self, columns:Dict[str, np.ndarray]) -> np.ndarray:
+        # The samples of the cache are already at their true rate (see read_cached)
+        if 'SAMPLE_REPEAT' in columns:
+            self.sample_repeat = int(columns['SAMPLE_REPEAT'])
+            return columns['SAMPLES']
+        return self.remove_repeated_samples(columns['SAMPLES'])
+    
+    def is_memory_mapped(self, data:np.ndarray) -> bool:
+        # The first array of the views of a memory-mapped file is backed by the mmap
+        base = data
+        while isinstance(base, np.ndarray):
+            base = base.base
+        return isinstance(base, mmap.mmap)
     
     def clean_data(self, data):
-        # The goal is to remove the data that doesn't have pulses
-        # Using standard deviation and range
-        pulse_std = np.std(data, axis=1)
-        pulse_range = np.ptp(data, axis=1)
-        
-        # Defined threshold 
-        std_thres = 10
-        range_thres = 10
-        
-        valid_pulses = (pulse_std > std_thres) & (pulse_range > range_thres)
-        
-        return data[valid_pulses]
+        # The goal is to remove the data that doesn't have pulses (see AnalysisEngine.is_valid)
+        return data[self.valid_records(data)]
     
-    def read_file(self, path:str):
-        # Determine if its a .dat or .csv file
-        if path.lower().endswith(".csv"):
-            info = self.read_csv(path)
-        elif path.lower().endswith(".dat"):
-            self.model_controller.send_feedback("To be implemented")
-            #info = self.read_raw(path)
+    def valid_records(self, data) -> np.ndarray:
+        # Which records have a pulse, the rejected ones are counted (the counts of the last cleaning of the engine)
+        self.engine.rejected = {}
+        valid = self.engine.is_valid(data, self.engine.rejected)
+        self.rejected = dict(self.engine.rejected)
+        return valid
+    
+    def rejection_feedback(self) -> str:
+        records = self.rejected.get('records', 0)
+        screen = self.rejected.get('screen', 0)
+        std = self.rejected.get('std', 0)
+        return (f"{records - screen - std} of {records} records kept "
+                f"({screen} rejected by the range, {std} by the standard deviation)")
+    
+    def detect_format(self, path:str) -> Reader | None:
+        # The format is found from the first bytes of the file, not its extension
+        reader = self.formats.detect(path)
+        if reader is None: # File format can't be analysed
+            self.model_controller.send_feedback("Unknown file format!")
+        else:
+            self.model_controller.send_feedback(f"{reader.name} detected!")
+        return reader
+    
+    def set_samples(self, samples:np.ndarray, timestamps:np.ndarray|None=None):
+        # New pulses, nothing of the last analysis can be reused
+        self.samples = samples
+        self.timestamps = timestamps
+        self.stage_outputs = {}
+        self.source = None
+    
+    def file_identity(self, path:str) -> tuple:
+        stat = os.stat(path)
+        return (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    
+    def is_read(self, path:str) -> bool:
+        # The file is already read (and didn't change), only the analysis has to be done again
+        try:
+            return self.source is not None and self.source == self.file_identity(path)
+        except OSError:
             return False
-        else: # File format can't be analysed
-            self.model_controller.send_feedback("Not a .csv or .dat file!")
+    
+    def read_file(self, path:str):
+        reader = self.detect_format(path)
+        if reader is None:
             return False
+        if reader.use_cache:
+            columns = self.read_cached(path, reader.read)
+        else: # Memory-mapped, the pulses are only read when they are used
+            columns = reader.read(path)
+        info = columns['SAMPLES']
         
         if len(info) == 0: # Check if the array is empty
             self.model_controller.send_feedback("No data to analyse!")
             return False
         
-        # Remove flat with noise data
-        clean_info = self.clean_data(np.array(info))
-        
-        # Change the analyser's data
-        self.pulse_info = np.array(clean_info)
+        # Change the analyser's data (memory-mapped files are still not read,
+        # the flat pulses are removed during the analysis)
+        self.set_samples(self.true_rate_samples(columns), reader.timestamps(columns))
+        self.source = self.file_identity(path)
         # Notify the user
         self.model_controller.send_feedback("Data extracted from file")
         
         self.prep_data()
         return True
     
+    def stream_file(self, path:str):
+        """
+        Analyses the file one block of pulses at a time (clean, level, integrate and dose).
+        Only the results of each pulse and the running totals are kept, so the memory
+        used depends on the size of the blocks and not on the size of the file.
+        """
+        reader = self.detect_format(path)
+        if reader is None:
+            return False
+        
+        n_pulses = self.model_controller.get_BLOCK_SIZE()
+        tables = []
+        areas = []
+        doses = []
+        times = []
+        # Record of the file where the block starts
+        first_record = 0
+        last_block = None
+        self.area_statistics.reset()
+        self.dose_statistics.reset()
+        self.rejected = {}
+        
+        for i, (block, timestamps) in enumerate(self.iter_blocks(path, reader, n_pulses)):
+            self.model_controller.send_feedback(f"Analysing block {i + 1}...")
+            self.set_samples(block, timestamps)
+            self.prep_data()
+            # The statistics of the blocks are added together
+            self.analyse_pulses(accumulate=True)
+            first_record += len(block)
+            if self.nbr_of_pulse == 0:
+                continue
+            
+            # Keep the results of each pulse, the running statistics are shown
+            table = self.pulses.copy()
+            table['record'] += first_record - len(block)
+            tables.append(table)
+            areas.append(self.area_under_curve)
+            doses.append(self.dose)
+            times.append(self.pulse_times())
+            self.model_controller.send_feedback(self.statistics_feedback())
+            # The blocks of the readers are reused, the valid pulses are copied
+            last_block = (self.samples[self.valid], self.baselines, self.sample_repeat)
+        
+        if last_block is None: # Check if there was any pulse
+            self.model_controller.send_feedback("No data to analyse!")
+            return False
+        
+        # Only the last block is kept for the pulse graph
+        self.set_samples(last_block[0])
+        self.baselines, self.sample_repeat = last_block[1:]
+        self.valid = np.ones(len(self.samples), dtype=bool)
+        self.prep_data()
+        self.pulses = np.concatenate(tables)
+        self.area_under_curve = np.concatenate(areas)
+        self.dose = np.concatenate(doses)
+        self.time_index = None if any(t is None for t in times) else TimeIndex(np.concatenate(times), self.dose)
+        self.nbr_of_pulse = len(self.area_under_curve)
+        self.total_area = self.area_statistics.total
+        self.total_dose = self.dose_statistics.total
+        self.model_controller.send_feedback(self.rejection_feedback())
+        self.model_controller.send_feedback("Data analysed by blocks")
+        return True
+    
     def prep_data(self):
-        # Set SAMPLE_SIZE
-        self.SAMPLE_SIZE = np.shape(self.pulse_info)[1] # Find number of columns
+        # Set SAMPLE_SIZE (number of samples in the record, with the repeated ones)
+        self.SAMPLE_SIZE = np.shape(self.samples)[1] * self.sample_repeat # Find number of columns
         
         # Calculate t_axis and dt
         # *0.001 pour [ns] --> [µs]
-        self.t_axis, self.dt = np.linspace(
+        t_axis, dt = np.linspace(
             0, int(self.model_controller.get_rcd_len()) * 0.001, self.SAMPLE_SIZE, retstep=True)
+        # Time of the samples kept
+        self.t_axis = t_axis[::self.sample_repeat]
+        self.dt = dt * self.sample_repeat
 
-        # Find the number of pulse
-        self.nbr_of_pulse = np.shape(self.pulse_info)[0] # Find number of rows
-    
-    def level_data(self):
-        choice = self.model_controller.get_LEVELING_METHOD()
-        match choice:
-            case 'median':
-                self.median_method()
-            case 'dynamic-mean':
-                self.derivation_method(choice)
-            case 'dynamic-median':
-                self.derivation_method(choice)
-            case _:
-                self.derivation_method('dynamic-mean')
-                
-        # The pulses are not in V but in LSB (see documentation for details)
-        self.convert_LSB2V()
-    
-    def median_method(self):
-        threshold = 8
-
-        # Calculate de median of each pulse
-        sous = np.median(self.pulse_info[:, :200], axis=1)
-        # Bring values close to zero
-        self.pulse_info = (self.pulse_info.T - sous).T
-        # Bring value to zero if lower than threshold
-        self.pulse_info[np.abs(self.pulse_info) < threshold] = 0
     
-    def derivation_method(self, choice:str):
-        # Derivation calculations
-        left  = self.pulse_info[:,  :-1]
-        right = self.pulse_info[:, 1:  ]
-        
-        # THIS IS VERY IMPORTANT (AND TOOK TOO LONG TO FIND)
-        variation = 10 # Interval at which the digitizer samples data (ie 10 per nanoseconds)
-        deriver = (right - left) / variation
-        
-        # Find the threshold of the derivative
-        deriver_tr = deriver[np.arange(self.nbr_of_pulse), np.abs(self.pulse_info).min(axis=1).astype(int)]
-        
-        threshold = 1.0 # This is found manually
-        dervier_mask = np.abs(deriver) > threshold
-        left_bond  = np.argmax(dervier_mask, axis=1)
-        right_bond = np.nanargmax(np.where(
-            dervier_mask[::-1], np.arange(dervier_mask.shape[1]), np.nan)[::-1], axis=1)
+    def analyse_pulses(self, accumulate:bool=False):
+        # Clean, level, integrate and dose every pulse (see AnalysisEngine)
+        # accumulate: add the pulses to the statistics of the last analysis (next block of a file)
+        # Only the stages whose parameters changed since the last analysis are done again
+        keys = self.engine.stage_keys(self.sample_repeat, self.dt, self.convertion_factor)
+        reuse = {name: output for name, (key, output) in self.stage_outputs.items() if keys.get(name) == key}
+        results = self.engine.analyse(self.samples, self.sample_repeat, self.dt, self.convertion_factor, reuse=reuse)
+        self.stage_outputs = {name: (key, results[name]) for name, key in keys.items()}
+        self.leveling_method = self.model_controller.get_LEVELING_METHOD()
+        self.valid = results['VALID']
+        self.baselines = results['BASELINE']
+        self.pulses = results['PULSES']
+        self.area_under_curve = results['AREA']
+        self.dose = results['DOSE']
         
-        # Isolate the pulse and set its derivative to inf
-        col_indices = np.arange(deriver.shape[1])
-        # Create a mask by checking if the column indices fall within the left and right bonds
-        mask = (col_indices >= left_bond[:, None]) & (col_indices < right_bond[:, None])
-        deriver[mask] = np.inf
-        
-        # Find the baseline of each pulse using the derivative and the derivative threshold
-        baseline_mask = np.logical_or(np.abs(deriver) != np.inf, np.abs(deriver) < deriver_tr[:, np.newaxis])
-        pulse_info_mask = np.where(baseline_mask, self.pulse_info[:,:-1], np.nan) # Where theres the pulse peak, values are nan
-        
-        # Do mean or median
-        match choice:
-            case 'dynamic-mean':
-                baselines = np.nanmean(pulse_info_mask, axis=1) # Mean excluding values set at nan
-            case 'dynamic-median':
-                baselines = np.nanmedian(pulse_info_mask, axis=1) # Mediane excluding values set at nan
-            case _:
-                baselines = np.nanmean(pulse_info_mask, axis=1)
-        
-        self.pulse_info = self.pulse_info - baselines[:, np.newaxis]
-             
-    def calculate_area(self):
-        # Choosing which calculation method to use
-        choice = self.model_controller.get_AREA_CALCULATION_METHOD()
-        match choice:
-            case 'trap':
-                self.trapezoid_area()
-            case 'approx-HRM':
-                self.HRM_area()
-            case _:
-                self.trapezoid_area()
-                
-    # Trapezoid method with matrices
-    def trapezoid_area(self):
-        left  = self.pulse_info[:,  :-1]
-        right = self.pulse_info[:, 1:  ]
-        
-        # Calculating the area under each trapezoid
-        area = (left + right) * self.dt / 2
-        
-        self.area_under_curve = np.sum(area, axis=1)
-        self.convert_Vs2nC()
-
-        # Calculating the total area of all the pulses
-        self.total_area = np.sum(self.area_under_curve)
-        
-    # Arthur's method: High Resolution Method Approximation
-    def HRM_area(self):
-        self.area_under_curve = np.sum(self.pulse_info, axis=1) * self.dt
-        self.convert_Vs2nC()
-        
-        # Calculating the total area of all the pulses
+        # Find the number of pulse
+        self.nbr_of_pulse = len(self.area_under_curve)
+        # Calculating the total area and dose of all the pulses
         self.total_area = np.sum(self.area_under_curve)
+        self.total_dose = np.sum(self.dose)
+        if not accumulate:
+            self.area_statistics.reset()
+            self.dose_statistics.reset()
+            self.rejected = {}
+        for name, count in self.engine.rejected.items():
+            self.rejected[name] = self.rejected.get(name, 0) + count
+        if not accumulate and 'VALID' not in reuse:
+            # The counts are only given when the records are cleaned
+            self.model_controller.send_feedback(self.rejection_feedback())
+        self.area_statistics.update(self.area_under_curve)
+        self.dose_statistics.update(self.dose)
+        times = self.pulse_times()
+        self.time_index = None if times is None else TimeIndex(times, self.dose)
     
-    def convert_LSB2V(self):
-        coarse_gain:float = self.model_controller.get_COARSEGAIN()
-        adc_n_bits:int = self.model_controller.get_ADC_NBIT()
-        convertion_factor = coarse_gain / (2 ** adc_n_bits)
-        # [LSB] --> [V]
-        self.pulse_info *= convertion_factor
+    def pulse_times(self) -> np.ndarray | None:
+        # Time of each pulse (ps): the time of its record and the start of its window
+        if self.timestamps is None:
+            return None
+        offset = np.round(self.pulses['start'] * self.dt * 1e6).astype(np.int64)
+        return self.timestamps[self.pulses['record']] + offset
     
-    def convert_Vs2nC(self):
-        # [V*µs] --> [V*s]
-        self.area_under_curve *= (1e6**2)
-        # [V*s] --> [C]
-        self.area_under_curve *= self.convertion_factor
-        # [C] --> [nC] 
-        self.area_under_curve *= 1e-9
+    def statistics_feedback(self) -> str:
+        dose = self.dose_statistics
+        return (f"{dose.count} pulses, total dose {dose.total:.4g} cGy, "
+                f"dose per pulse {dose.mean:.4g} ± {dose.std():.2g} cGy")
     
-    def calculate_dose(self):
-        # Get controller convertion factor
-        convertion_factor:float = self.model_controller.get_dose_factor()
-        self.dose = self.area_under_curve * convertion_factor
-        # Calculating the total dose
-        self.total_dose = np.sum(self.dose)
+    def benchmark_stages(self, rounds:int=3) -> List[Dict]:
+        # Every registered leveler, integrator and dose model on the pulses read (see AnalysisEngine.benchmark)
+        return self.engine.benchmark(self.samples, self.sample_repeat, self.dt, self.convertion_factor, rounds)
         
     def prepare_list(self):
         # Packing data to be read by the List
@@ -265,50 +345,77 @@ class DataAnalyser:
 
         # Adding the total label
         self.data.append(["Total", self.total_area, self.total_dose])
+        # And the spread of the pulses
+        self.data.append(["Moyenne", self.area_statistics.mean, self.dose_statistics.mean])
+        self.data.append(["Écart type", self.area_statistics.std(), self.dose_statistics.std()])
     
     def analyse_data(self, graph_showcase:"GraphShowcase", data):
         """
         data: contient toute les pulses avec mean > 2000
         [[
             channel.copy(), flags.copy(), 
-            waveform_size.copy(), analog_probe_1.copy()
+            waveform_size.copy(), analog_probe_1.copy(),
+            timestamp.copy()
         ], ...]
         """
-        # Extract the information we need
-        self.SAMPLE_SIZE = int(data[0][2])
-        raw_pulses = []
-        for pulses_info in data:
-            raw_pulses.append(pulses_info[3])
-        # Clean data
-        clean_pulses = self.clean_data(np.array(raw_pulses))
-        self.pulse_info = clean_pulses
-        # Calculate t_axis and dt
-        self.t_axis, self.dt = np.linspace(
-            0, int(self.model_controller.get_rcd_len()) / 1000, self.SAMPLE_SIZE, retstep=True)
-
-        # Find the number of pulse
-        self.nbr_of_pulse = np.shape(self.pulse_info)[0] # Find number of rows
+        self.analyse_records(data)
+        self.show(graph_showcase)
+    
+    def analyse_records(self, data, samples:np.ndarray|None=None, valid:np.ndarray|None=None):
+        # Same as analyse_data, without the graphs (worker processes, see ShootProcessor)
+        # samples: the records of data already in a matrix, valid: the records already cleaned (see valid_records)
+        # Extract the information we need (the timestamps are ticks of the digitizer clock)
+        timestamps = np.array([int(str(pulses_info[4])) for pulses_info in data], dtype=np.int64) * TIMESTAMP_TICK_PS
+        if samples is None:
+            samples = np.array([pulses_info[3] for pulses_info in data], dtype=np.int16)
+        self.set_samples(samples, timestamps)
+        self.sample_repeat = 1
+        # Calculate t_axis and dt (IndexError if there's no pulse, see ShootProcessor)
+        self.prep_data()
+        if valid is not None:
+            # The records are not cleaned again (see analyse_pulses)
+            keys = self.engine.stage_keys(self.sample_repeat, self.dt, self.convertion_factor)
+            self.stage_outputs['VALID'] = (keys['VALID'], valid)
         
         # Do the rest
-        self.model_controller.send_feedback("Leveling data...")
-        self.level_data()
-        self.model_controller.send_feedback("Calculating areas under the curves...")
-        self.calculate_area()
-        self.model_controller.send_feedback("Calculating dosage...")
-        self.calculate_dose()
-        self.model_controller.send_feedback("Updating graphs et list...")
+        self.model_controller.send_feedback("Analysing pulses...")
+        self.analyse_pulses()
+        self.model_controller.send_feedback(self.statistics_feedback())
         self.prepare_list()
+    
+    def show(self, graph_showcase:"GraphShowcase"):
+        self.model_controller.send_feedback("Updating graphs et list...")
         graph_showcase.update_pulse_graph()
         graph_showcase.update_area_graph()
         graph_showcase.update_list()
         self.model_controller.send_feedback("Data analysed!")
 
+    def get_results(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.RESULTS}
+    def set_results(self, results:Dict[str, Any]):
+        # Results of the same pulses analysed by another DataAnalyser
+        for name in self.RESULTS:
+            setattr(self, name, results[name])
+        self.source = None
+
     def get_pulse_info(self) -> np.ndarray:
-        return self.pulse_info
+        # Leveled valid pulses (in V), only calculated when they are shown
+        return self.engine.level(np.asarray(self.samples[self.valid]), self.baselines,
+                                 self.leveling_method, self.engine.lsb2v_factor())
     def get_t_axis(self) -> np.ndarray:
         return self.t_axis
     def get_area_under_curve(self) -> np.ndarray:
         return self.area_under_curve
+    def get_pulse_table(self) -> np.ndarray:
+        # One line per pulse: record, start, end (samples kept), area (nC) and dose (cGy)
+        table = np.empty(len(self.pulses), dtype=PULSES_DTYPE.descr + [('area', np.float64), ('dose', np.float64)])
+        for name in PULSES_DTYPE.names:
+            table[name] = self.pulses[name]
+        table['area'] = self.area_under_curve
+        table['dose'] = self.dose
+        return table
+    def get_time_index(self) -> TimeIndex | None:
+        return self.time_index
     def get_nbr_of_pulse(self) -> int:
         return self.nbr_of_pulse
     def get_data_list(self) -> list[list[Any]]:
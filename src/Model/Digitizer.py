@@ -1,14 +1,9 @@
 import numpy as np
+from types import SimpleNamespace
 from typing import TYPE_CHECKING, Any, Dict
 
-import matplotlib.pyplot as plt
 from src.Model.Error import Error
 
-# To install the module: pip install caen-felib
-from caen_felib import lib, device, error
-
-print(f'CAEN FELib wrapper loaded (lib version {lib.version})')
-
 if TYPE_CHECKING:
     from Controller.ModelController import ModelController
     from Controller.Controller import Parameter
@@ -31,6 +26,8 @@ class Digitizer:
         
         # Make uri for accessing digitizer
         self.make_uri()
+        # caen_felib (lib, device and error), imported the first time the digitizer is used
+        self.felib:SimpleNamespace|None = None
         
         # isRECORDING access
         self.controller = model_controller.controller
@@ -50,10 +47,25 @@ class Digitizer:
         dig1_path = connection_type
         self.uri = f'{dig1_scheme}://{dig1_authority}/{dig1_path}?{dig1_query}'
 
+    def caen(self) -> SimpleNamespace:
+        """
+        The CAEN library is only needed to use the digitizer. It's imported when it's first used
+        so the program starts (and analyses files) on computers where it isn't installed.
+        Raises ImportError if it isn't installed (see Error.handle_CAEN_exceptions)
+        """
+        if self.felib is None:
+            # To install the module: pip install caen-felib
+            from caen_felib import lib, device, error
+            print(f'CAEN FELib wrapper loaded (lib version {lib.version})')
+            self.felib = SimpleNamespace(lib=lib, device=device, error=error)
+        return self.felib
+    
     def ping_digitizer(self):
         try:
-            with device.connect(self.uri):
+            with self.caen().device.connect(self.uri):
                 return False
+        except ImportError:
+            raise # Not a connection problem
         except Exception:
             self.model_controller.controller.hasDIGITIZERCONNECTED = False
             self.model_controller.controller.change_aqc_panel_status('Déconnecté')
@@ -68,7 +80,7 @@ class Digitizer:
             self.send_feedback("Couldn't connect to digitizer!")
         self.send_feedback("Attempting to connect to digitizer...")
 
-        with device.connect(self.uri) as dig:
+        with self.caen().device.connect(self.uri) as dig:
             self.send_feedback("Digitizer connected! Retreiving basic info...")
             self.model_controller.controller.isGETTING_BASIC_INFO = True
             # Change status
@@ -128,7 +140,7 @@ class Digitizer:
         
         #TODO: The check box will make the record data click-able
         
-        with device.connect(self.uri):
+        with self.caen().device.connect(self.uri):
             self.send_feedback("I dont really understand how this would works... Im currently reseting the board every time data is being recorded")
 
     def _on_close_plot(self, event):
@@ -174,7 +186,7 @@ class Digitizer:
                     continue
         
         self.send_feedback("Parameters fetched! Connecting to digitizer...")
-        with device.connect(self.uri) as dig:
+        with self.caen().device.connect(self.uri) as dig:
             self.send_feedback("Connected! Configurating parameters")
             # Reset
             dig.cmd.RESET()
@@ -286,7 +298,8 @@ class Digitizer:
             digital_probe_1_type = data[7].value  # Integer value described in Supported Endpoints > Probe type meaning
             waveform_size = data[8].value
             
-            # Configure plot
+            # Configure plot (pyplot is only needed here)
+            import matplotlib.pyplot as plt
             plt.ion()
             figure, ax = plt.subplots(figsize=(5, 4))
             lines = []
@@ -311,16 +324,17 @@ class Digitizer:
                     endpoint.read_data(10,data)
                     all_detect.append([ # We don't use the other values 
                         channel.copy(), flags.copy(),
-                        waveform_size.copy(), analog_probe_1.copy()
+                        waveform_size.copy(), analog_probe_1.copy(),
+                        timestamp.copy()
                     ])
                     if np.mean(analog_probe_1) > 2500:
                         self.send_feedback(f"Pulse detected! {k}")
                         k += 1
                 
-                except error.Error as ex:
-                    if ex.code == error.ErrorCode.TIMEOUT:
+                except self.caen().error.Error as ex:
+                    if ex.code == self.caen().error.ErrorCode.TIMEOUT:
                         continue
-                    elif ex.code == error.ErrorCode.STOP:
+                    elif ex.code == self.caen().error.ErrorCode.STOP:
                         break
                     else:
                         raise ex
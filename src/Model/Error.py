@@ -1,4 +1,4 @@
-from caen_felib import error
+import sys
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -13,7 +13,14 @@ class Error:
         def wrapper(*args, **kwargs):
             try:
                 return func(*args, **kwargs)
-            except error.Error as ex:
+            except ImportError as ex: # caen_felib isn't installed (see Digitizer.caen)
+                self.controller.change_states()
+                self.send_feedback(f"The CAEN FELib library couldn't be loaded ({ex}). Install it to use the digitizer: pip install caen-felib")
+            except Exception as ex:
+                # The CAEN errors can only be raised if caen_felib was imported
+                error = sys.modules.get('caen_felib.error')
+                if error is None or not isinstance(ex, error.Error):
+                    raise ex
                 # -6: Command error
                 if ex.code.value == error.ErrorCode.COMMAND_ERROR:
                     self.controller.change_states()
@@ -0,0 +1,119 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+import numpy as np
+
+from typing import Dict, List
+
+# Bytes read at the start and at the end of a file for its content hash
+HASH_SAMPLE = 1 << 20
+
+
+def user_cache_directory() -> str:
+    # Cache directory of the user (not the directory the program is started from)
+    if sys.platform == 'win32':
+        root = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~\\AppData\\Local')
+    elif sys.platform == 'darwin':
+        root = os.path.expanduser('~/Library/Caches')
+    else:
+        root = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(root, 'FLASHy', 'ParseCache')
+
+
+# Keeps the decoded columns of the files already read (one .npy per column) so they
+# can be opened again with np.memmap instead of parsing the whole file again.
+# The entries used the least recently are removed when the cache gets too big.
+class ParseCache:
+    def __init__(self, directory:str|None=None, max_bytes:int=2 << 30):
+        self.directory = directory or user_cache_directory()
+        # 0 disables the cache
+        self.max_bytes = max_bytes
+
+    def entry_path(self, path:str) -> str:
+        key = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()
+        return os.path.join(self.directory, key)
+
+    def identity(self, path:str) -> Dict:
+        """
+        What must not have changed for an entry to be valid: path, size, mtime and a
+        hash of the content. Hashing a whole file would cost as much as parsing it, so
+        only its first and last megabytes are hashed (with its size).
+        """
+        stat = os.stat(path)
+        content_hash = hashlib.sha256(str(stat.st_size).encode())
+        with open(path, 'rb') as f:
+            content_hash.update(f.read(HASH_SAMPLE))
+            if stat.st_size > HASH_SAMPLE:
+                f.seek(max(stat.st_size - HASH_SAMPLE, HASH_SAMPLE))
+                content_hash.update(f.read())
+        return {
+            'path'         : os.path.abspath(path),
+            'size'         : stat.st_size,
+            'mtime_ns'     : stat.st_mtime_ns,
+            'content_hash' : content_hash.hexdigest(),
+        }
+
+    def load(self, path:str) -> Dict[str, np.ndarray] | None:
+        if self.max_bytes <= 0:
+            return None
+        entry = self.entry_path(path)
+        meta_path = os.path.join(entry, 'meta.json')
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            identity = self.identity(path)
+            if any(meta.get(key) != value for key, value in identity.items()):
+                return None # The file changed since it was cached
+            columns = {name: np.load(os.path.join(entry, f'{name}.npy'), mmap_mode='r', allow_pickle=False)
+                       for name in meta['columns']}
+        except (OSError, ValueError, KeyError):
+            return None # Not cached (or a broken entry)
+
+        # Most recently used
+        os.utime(meta_path)
+        return columns
+
+    def store(self, path:str, columns:Dict[str, np.ndarray]):
+        n_bytes = sum(np.asarray(column).nbytes for column in columns.values())
+        if n_bytes > self.max_bytes:
+            return # Wouldn't fit, even alone
+        entry = self.entry_path(path)
+        try:
+            shutil.rmtree(entry, ignore_errors=True)
+            os.makedirs(entry, exist_ok=True)
+            for name, column in columns.items():
+                np.save(os.path.join(entry, f'{name}.npy'), np.asarray(column), allow_pickle=False)
+            # Written last: an entry without meta.json is incomplete and never loaded
+            meta = self.identity(path) | {'columns': list(columns), 'bytes': n_bytes}
+            with open(os.path.join(entry, 'meta.json'), 'w') as f:
+                json.dump(meta, f)
+        except OSError:
+            shutil.rmtree(entry, ignore_errors=True)
+            return
+        self.evict()
+
+    def evict(self):
+        # Remove the least recently used entries until the cache is small enough
+        entries:List[tuple] = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            entry = os.path.join(self.directory, name)
+            try:
+                meta_path = os.path.join(entry, 'meta.json')
+                with open(meta_path, 'r') as f:
+                    n_bytes = json.load(f)['bytes']
+                entries.append((os.stat(meta_path).st_mtime_ns, n_bytes, entry))
+            except (OSError, ValueError, KeyError):
+                shutil.rmtree(entry, ignore_errors=True) # Incomplete entry
+
+        total = sum(n_bytes for _, n_bytes, _ in entries)
+        for _, n_bytes, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= n_bytes
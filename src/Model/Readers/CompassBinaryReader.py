@@ -0,0 +1,77 @@
+import os
+import numpy as np
+
+from src.Model.Readers.Reader import Reader
+
+from typing import Dict, Iterator
+
+# CoMPASS (>= 2.0) binary files start with a 16 bits header 0xCAEx.
+# The 4 low bits tell which fields are saved for every event
+HEADER_MAGIC     = 0xCAE0
+HAS_ENERGY       = 0x1
+HAS_CALIB_ENERGY = 0x2
+HAS_ENERGY_SHORT = 0x4
+HAS_WAVEFORM     = 0x8
+HEADER_SIZE      = 2
+
+
+# Vectorized reader for the binary list-mode files of CoMPASS (with waveforms).
+# Every event is
+#   BOARD u16, CHANNEL u16, TIMETAG u64, [ENERGY u16], [CALIB_ENERGY f64], [ENERGY_SHORT u16], FLAGS u32,
+#   WAVEFORM_CODE u8, N_SAMPLES u32, SAMPLES u16 * N_SAMPLES
+# The record length is the same for every event, so the file is a plain array of records
+class CompassBinaryReader(Reader):
+    name = "CoMPASS binary"
+    use_cache = False # Read directly with np.memmap
+    time_column = 'TIMETAG'
+
+    def detect(self, head:bytes) -> bool:
+        return len(head) >= HEADER_SIZE and int.from_bytes(head[:HEADER_SIZE], 'little') & 0xFFF0 == HEADER_MAGIC
+
+    def event_dtype(self, path:str) -> np.dtype:
+        with open(path, 'rb') as f:
+            header = int.from_bytes(f.read(HEADER_SIZE), 'little')
+            if not header & HAS_WAVEFORM:
+                raise ValueError("This CoMPASS file doesn't have the waveforms")
+
+            fields = [('BOARD', '<u2'), ('CHANNEL', '<u2'), ('TIMETAG', '<u8')]
+            if header & HAS_ENERGY:
+                fields.append(('ENERGY', '<u2'))
+            if header & HAS_CALIB_ENERGY:
+                fields.append(('CALIB_ENERGY', '<f8'))
+            if header & HAS_ENERGY_SHORT:
+                fields.append(('ENERGY_SHORT', '<u2'))
+            fields += [('FLAGS', '<u4'), ('WAVEFORM_CODE', 'u1'), ('N_SAMPLES', '<u4')]
+
+            # Number of samples of the first event
+            f.seek(HEADER_SIZE + np.dtype(fields).itemsize - 4)
+            n_samples = int.from_bytes(f.read(4), 'little')
+        return np.dtype(fields + [('SAMPLES', '<u2', (n_samples,))])
+
+    def open_events(self, path:str) -> np.ndarray:
+        size = os.path.getsize(path) - HEADER_SIZE
+        if size <= 0:
+            return np.zeros(0, dtype=[('N_SAMPLES', '<u4'), ('SAMPLES', '<u2', (0,))])
+        dtype = self.event_dtype(path)
+        if size % dtype.itemsize != 0:
+            raise ValueError("The events of this CoMPASS file don't all have the same number of samples")
+        events = np.memmap(path, dtype=dtype, mode='r', offset=HEADER_SIZE, shape=(size // dtype.itemsize,))
+        if np.any(events['N_SAMPLES'] != dtype['SAMPLES'].shape[0]):
+            raise ValueError("The events of this CoMPASS file don't all have the same number of samples")
+        return events
+
+    def to_columns(self, events:np.ndarray) -> Dict[str, np.ndarray]:
+        # The header columns are small, they are copied. The samples are 14 bits, the same bytes
+        # are read as int16: a view of the memory-mapped file, only read when they are used
+        columns = {name: np.array(events[name]) for name in events.dtype.names
+                   if name not in ('WAVEFORM_CODE', 'N_SAMPLES', 'SAMPLES')}
+        columns['SAMPLES'] = events['SAMPLES'].view('<i2')
+        return columns
+
+    def read(self, path:str) -> Dict[str, np.ndarray]:
+        return self.to_columns(self.open_events(path))
+
+    def iter_blocks(self, path:str, n_pulses:int) -> Iterator[Dict[str, np.ndarray]]:
+        events = self.open_events(path)
+        for start in range(0, len(events), n_pulses):
+            yield self.to_columns(events[start:start + n_pulses])
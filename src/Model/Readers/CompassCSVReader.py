@@ -0,0 +1,233 @@
+import numpy as np
+
+from src.Model.Readers.Reader import Reader
+
+from typing import Dict, Iterator
+
+# Byte values used while tokenizing
+SEMICOLON = ord(';')
+NEWLINE   = ord('\n')
+CARRIAGE  = ord('\r')
+MINUS     = ord('-')
+ZERO      = ord('0')
+
+# Header of a CoMPASS waveform export. Everything after PROBE_CODE is a sample
+COMPASS_HEADER = ('BOARD', 'CHANNEL', 'TIMETAG', 'ENERGY', 'CALIB_ENERGY', 'FLAGS', 'PROBE_CODE')
+N_HEADER = len(COMPASS_HEADER)
+
+
+def parse_int_tokens(buf:np.ndarray, starts:np.ndarray, ends:np.ndarray, width:int, dtype=np.int64) -> np.ndarray:
+    """
+    Decodes the decimal integers found in buf[starts[i]:ends[i]] without creating
+    Python objects. The digits are added one column at a time, from the last one
+    (units) to the first one, so every pass is a plain vector operation.
+    """
+    # int32 is enough for up to 9 digits and halves the memory traffic
+    # (the indices stay np.intp, numpy would convert them on every gather otherwise)
+    work = np.int32 if width <= 9 else np.int64
+    lengths = ends - starts
+    # No need to look further than the longest token
+    width = min(width, int(lengths.max(initial=0)))
+    shortest = int(lengths.min(initial=0))
+
+    values = np.zeros(len(ends), dtype=work)
+    pos = ends.copy()
+    for k in range(width):
+        pos -= 1
+        digit = buf[pos].astype(work)
+        digit -= ZERO
+        np.maximum(digit, 0, out=digit) # The sign
+        if k >= shortest: # Some tokens are already done
+            digit[lengths <= k] = 0
+        digit *= work(10 ** k)
+        values += digit
+
+    negative = buf[starts] == MINUS
+    values[negative] *= -1
+    return values.astype(dtype, copy=False)
+
+def parse_hex_tokens(buf:np.ndarray, starts:np.ndarray, ends:np.ndarray, width:int) -> np.ndarray:
+    # Same as parse_int_tokens but for the '0x8000' style FLAGS column
+    has_prefix = (ends - starts > 2) & (buf[np.clip(starts + 1, None, len(buf) - 1)] | 0x20 == ord('x'))
+    starts = starts + 2 * has_prefix
+
+    idx = ends[:, np.newaxis] + np.arange(-width, 0)
+    outside = idx < starts[:, np.newaxis]
+    chars = buf[np.clip(idx, 0, None)].astype(np.int64) | 0x20 # Lower case letters
+    digits = np.where(chars >= ord('a'), chars - ord('a') + 10, chars - ZERO)
+    digits[outside] = 0
+
+    return digits @ (16 ** np.arange(width - 1, -1, -1, dtype=np.int64))
+
+def parse_float_tokens(buf:np.ndarray, starts:np.ndarray, ends:np.ndarray, width:int) -> np.ndarray:
+    # Fixed width byte strings are converted by numpy itself (used for the small header columns only)
+    idx = ends[:, np.newaxis] + np.arange(-width, 0)
+    chars = buf[np.clip(idx, 0, None)].copy()
+    chars[idx < starts[:, np.newaxis]] = ord(' ')
+    return np.char.strip(chars.view(f'S{width}').ravel()).astype(np.float64)
+
+
+# Bulk parser for the CoMPASS 'BOARD;CHANNEL;TIMETAG;...;SAMPLES' layout
+class CompassCSVReader(Reader):
+    name = "CoMPASS csv"
+    time_column = 'TIMETAG'
+
+    def __init__(self, block_size:int=1 << 19):
+        # Number of bytes read from the disk (and decoded) at once. parse_block makes about 80 bytes
+        # of temporaries per sample (~5 bytes of text), so this is what limits the memory used
+        self.block_size = block_size
+        # Maximum number of characters in a sample (14 bits ADC --> 5 digits, with a sign)
+        self.sample_width = 6
+
+    def detect(self, head:bytes) -> bool:
+        # 'BOARD;CHANNEL;TIMETAG;...' (the separator is enough, FLASHy csv use ',')
+        return b';' in self.first_line(head)
+
+    def count_rows(self, path:str) -> int:
+        # First pass: count the lines to preallocate the matrix (header excluded)
+        n_lines = 0
+        last = b'\n'
+        with open(path, 'rb') as f:
+            while True:
+                block = f.read(self.block_size)
+                if not block:
+                    break
+                n_lines += block.count(b'\n')
+                last = block[-1:]
+        if last != b'\n':
+            n_lines += 1 # No newline at the end of the file
+        return max(n_lines - 1, 0)
+
+    def count_samples(self, path:str) -> int:
+        with open(path, 'rb') as f:
+            f.readline() # Header
+            first_row = f.readline()
+        if not first_row.strip():
+            return 0
+        return first_row.count(b';') + 1 - N_HEADER
+
+    def allocate(self, n_rows:int, n_samples:int) -> Dict[str, np.ndarray]:
+        return {
+            'BOARD'        : np.empty(n_rows, dtype=np.int16),
+            'CHANNEL'      : np.empty(n_rows, dtype=np.int16),
+            'TIMETAG'      : np.empty(n_rows, dtype=np.int64),
+            'ENERGY'       : np.empty(n_rows, dtype=np.int32),
+            'CALIB_ENERGY' : np.empty(n_rows, dtype=np.float64),
+            'FLAGS'        : np.empty(n_rows, dtype=np.uint32),
+            'PROBE_CODE'   : np.empty(n_rows, dtype=np.int16),
+            'SAMPLES'      : np.empty((n_rows, n_samples), dtype=np.int16),
+        }
+
+    def parse_block(self, block:bytes, columns:Dict[str, np.ndarray], row:int) -> int:
+        """
+        Decodes every complete line of block into columns, starting at the line row.
+        Returns the number of lines decoded.
+        """
+        # Empty lines at the end of the file
+        block = block.rstrip()
+        if not block:
+            return 0
+        buf = np.frombuffer(block + b'\n', dtype=np.uint8)
+        n_cols = columns['SAMPLES'].shape[1] + N_HEADER
+
+        # The end of every token is a ';' or a '\n' (ignoring the '\r' of Windows files)
+        ends = np.flatnonzero((buf == SEMICOLON) | (buf == NEWLINE))
+        if len(ends) % n_cols != 0:
+            raise ValueError("The CoMPASS file doesn't have the same number of samples on every line")
+        starts = np.empty_like(ends)
+        starts[0] = 0
+        starts[1:] = ends[:-1] + 1
+        if CARRIAGE in block:
+            ends = ends - (buf[np.maximum(ends - 1, 0)] == CARRIAGE)
+
+        n_rows = len(ends) // n_cols
+        starts = starts.reshape(n_rows, n_cols)
+        ends = ends.reshape(n_rows, n_cols)
+        rows = slice(row, row + n_rows)
+
+        # Samples: the largest part of the file, decoded straight into the int16 matrix
+        columns['SAMPLES'][rows] = parse_int_tokens(
+            buf, starts[:, N_HEADER:].ravel(), ends[:, N_HEADER:].ravel(), self.sample_width, np.int16
+        ).reshape(n_rows, n_cols - N_HEADER)
+
+        # Header columns
+        for i, name in enumerate(COMPASS_HEADER):
+            match name:
+                case 'FLAGS':
+                    columns[name][rows] = parse_hex_tokens(buf, starts[:, i], ends[:, i], 10)
+                case 'CALIB_ENERGY':
+                    columns[name][rows] = parse_float_tokens(buf, starts[:, i], ends[:, i], 24)
+                case _:
+                    columns[name][rows] = parse_int_tokens(buf, starts[:, i], ends[:, i], 19, columns[name].dtype)
+        return n_rows
+
+    def read(self, path:str) -> Dict[str, np.ndarray]:
+        n_rows = self.count_rows(path)
+        n_samples = self.count_samples(path) if n_rows else 0
+        columns = self.allocate(n_rows, n_samples)
+
+        row = 0
+        leftover = b''
+        with open(path, 'rb') as f:
+            f.readline() # Header
+            while True:
+                block = f.read(self.block_size)
+                if not block:
+                    break
+                block = leftover + block
+                # Only parse complete lines, the rest goes with the next block
+                cut = block.rfind(b'\n') + 1
+                leftover = block[cut:]
+                if cut:
+                    row += self.parse_block(block[:cut], columns, row)
+            # Last line without a newline and empty lines at the end of the file
+            leftover = leftover.strip()
+            if leftover:
+                row += self.parse_block(leftover, columns, row)
+
+        # Remove the rows that were counted but empty
+        if row != n_rows:
+            columns = {name: column[:row] for name, column in columns.items()}
+        return columns
+
+    def iter_blocks(self, path:str, n_pulses:int) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Reads the file n_pulses lines at a time so the memory used doesn't depend on the
+        size of the file. The same buffers are reused for every block: copy what needs to be kept.
+        The lines are decoded block_size bytes at a time (like read), so the temporaries of
+        parse_block don't depend on n_pulses.
+        """
+        n_samples = self.count_samples(path)
+        columns = self.allocate(n_pulses, n_samples)
+        # Row of the block where the next line goes
+        row = 0
+
+        with open(path, 'rb') as f:
+            f.readline() # Header
+            leftover = b''
+            while True:
+                block = f.read(self.block_size)
+                data = leftover + block
+                if not block: # End of the file
+                    # Last line without a newline and empty lines at the end of the file
+                    if data.strip():
+                        row += self.parse_block(data, columns, row)
+                    break
+                # End of every complete line, the rest goes with the next bytes read
+                line_ends = np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == NEWLINE) + 1
+                start = 0
+                k = 0
+                while k < len(line_ends):
+                    # Only the lines that still fit in the block
+                    n_lines = min(n_pulses - row, len(line_ends) - k)
+                    cut = line_ends[k + n_lines - 1]
+                    row += self.parse_block(data[start:cut], columns, row)
+                    start = cut
+                    k += n_lines
+                    if row == n_pulses:
+                        yield {name: column[:row] for name, column in columns.items()}
+                        row = 0
+                leftover = data[start:]
+
+        if row:
+            yield {name: column[:row] for name, column in columns.items()}
@@ -0,0 +1,49 @@
+import csv
+import numpy as np
+from itertools import islice
+
+from src.Model.Readers.Reader import Reader
+from src.Model.ShootFile import TIMESTAMP_TICK_PS
+
+from typing import Dict, Iterator, List
+
+
+# Csv saved by save_to_csv (see src/Model/ShootProcessor.py)
+# ['Channel,Flag,Waveform_size,Timestamp,Samples'] where Samples is '[s1, s2, ...]'
+# (the files saved before the timestamps were kept don't have Timestamp)
+class FLASHyCSVReader(Reader):
+    name = "FLASHy csv"
+    time_column = 'TIMESTAMP'
+    time_unit_ps = TIMESTAMP_TICK_PS
+
+    def detect(self, head:bytes) -> bool:
+        return self.first_line(head).startswith(b'Channel,')
+
+    def parse_rows(self, rows:List[List[str]], header:List[str]) -> Dict[str, np.ndarray]:
+        rows = [row for row in rows if row] # Empty lines
+        columns = {
+            'CHANNEL' : np.array([int(row[0]) for row in rows], dtype=np.int16),
+            'FLAGS'   : np.array([int(row[1], 0) for row in rows], dtype=np.uint32),
+            # Isolate SAMPLES
+            'SAMPLES' : np.array([row[-1].replace('[', "").replace(']','').split(",") for row in rows], dtype=np.int16),
+        }
+        if 'Timestamp' in header:
+            i = header.index('Timestamp')
+            columns['TIMESTAMP'] = np.array([int(row[i]) for row in rows], dtype=np.uint64)
+        return columns
+
+    def iter_blocks(self, path:str, n_pulses:int) -> Iterator[Dict[str, np.ndarray]]:
+        with open(path, newline='') as f:
+            reader = csv.reader(f, delimiter=',')
+            header = next(reader)
+            while True:
+                rows = list(islice(reader, n_pulses))
+                if not rows:
+                    break
+                yield self.parse_rows(rows, header)
+
+    def read(self, path:str) -> Dict[str, np.ndarray]:
+        with open(path, newline='') as f:
+            reader = csv.reader(f, delimiter=',')
+            header = next(reader)
+            return self.parse_rows(list(reader), header)
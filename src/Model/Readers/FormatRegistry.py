@@ -0,0 +1,35 @@
+from src.Model.Readers.Reader import Reader
+from src.Model.Readers.ShootFileReader import ShootFileReader
+from src.Model.Readers.CompassBinaryReader import CompassBinaryReader
+from src.Model.Readers.LegacyShootReader import LegacyShootReader
+from src.Model.Readers.CompassCSVReader import CompassCSVReader
+from src.Model.Readers.FLASHyCSVReader import FLASHyCSVReader
+
+from typing import List
+
+# Number of bytes given to Reader.detect
+HEAD_SIZE = 4096
+
+
+# Finds which reader can read a file from its content (magic bytes or header), not its extension
+class FormatRegistry:
+    def __init__(self, workers:int|None=None):
+        # workers: processes used by the readers that decode in parallel (None: one per core)
+        self.readers:List[Reader] = []
+        # The binary formats are checked first, their magic bytes are the most specific
+        self.register(ShootFileReader())
+        self.register(CompassBinaryReader())
+        self.register(LegacyShootReader(workers))
+        self.register(CompassCSVReader())
+        self.register(FLASHyCSVReader())
+
+    def register(self, reader:Reader):
+        self.readers.append(reader)
+
+    def detect(self, path:str) -> Reader | None:
+        with open(path, 'rb') as f:
+            head = f.read(HEAD_SIZE)
+        for reader in self.readers:
+            if reader.detect(head):
+                return reader
+        return None
@@ -0,0 +1,144 @@
+import os
+import pickle
+import numpy as np
+
+from src.Model.Readers.Reader import Reader
+from src.Model.WorkerPool import WorkerPool
+
+from typing import Any, Dict, Iterator, List
+
+# Opcodes of the pickle protocol (see pickletools)
+PROTO = 0x80
+FRAME = 0x95
+STOP  = b'.'
+# PROTO + version + FRAME + frame length (8 bytes)
+FRAME_HEADER_SIZE = 11
+# The only names a pulse of the old save_raw_data needs: a list of strings, numbers and a numpy array
+ALLOWED_GLOBALS = {
+    ('builtins', 'list'), ('builtins', 'str'), ('builtins', 'int'),
+    ('numpy', 'ndarray'), ('numpy', 'dtype'),
+    ('numpy.core.multiarray', '_reconstruct'), ('numpy._core.multiarray', '_reconstruct'),
+    ('numpy.core.multiarray', 'scalar'), ('numpy._core.multiarray', 'scalar'),
+    # The bytes of the arrays with the protocol 2 (it doesn't have a bytes opcode)
+    ('_codecs', 'encode'),
+}
+
+
+# Any file starting with the pickle opcode is detected, and unpickling can run any function:
+# only the names of ALLOWED_GLOBALS can be loaded, anything else isn't a pulse of the program
+class FrameUnpickler(pickle.Unpickler):
+    def find_class(self, module:str, name:str) -> Any:
+        if (module, name) not in ALLOWED_GLOBALS:
+            raise ValueError(f"Not a FLASHy raw file (it contains {module}.{name})")
+        return super().find_class(module, name)
+
+
+def decode_frames(path:str, offsets:np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Unpickles the consecutive pulses starting at offsets. Each pulse was saved by the
+    old Controller.save_raw_data as [channel, flag, waveform_size, samples].
+    Module level function so it can be sent to the worker processes (see WorkerPool).
+    """
+    channels:List[int] = []
+    flags:List[int] = []
+    samples:List[np.ndarray] = []
+    with open(path, 'rb') as f:
+        if len(offsets):
+            f.seek(offsets[0])
+        for _ in range(len(offsets)):
+            pulse = FrameUnpickler(f).load()
+            channels.append(int(str(pulse[0])))
+            flags.append(int(str(pulse[1]), 0))
+            samples.append(pulse[-1])
+    return {
+        'CHANNEL' : np.array(channels, dtype=np.int16),
+        'FLAGS'   : np.array(flags, dtype=np.uint32),
+        'SAMPLES' : np.array(samples, dtype=np.int16),
+    }
+
+
+# Reader for the .dat files saved as concatenated pickles (before the binary format)
+class LegacyShootReader(Reader):
+    name = "Pickled raw data"
+
+    def __init__(self, workers:int|None=None, frames_per_task:int=2048):
+        # The pulses are decoded in worker processes (None: one per core)
+        self.pool = WorkerPool(workers)
+        # Pulses decoded by each task. Smaller files are decoded without any worker
+        self.frames_per_task = frames_per_task
+
+    def detect(self, head:bytes) -> bool:
+        # Pickle protocol 2 and more (the pulses were saved with the default protocol)
+        return head[:1] == bytes([PROTO])
+
+    def index_path(self, path:str) -> str:
+        return path + '.idx.npz'
+
+    def build_index(self, path:str) -> np.ndarray:
+        """
+        Finds where every pickle starts. A pulse is small enough to be pickled in a single
+        frame, so its end is known from the frame length without decoding it. Anything else
+        (older protocols, many frames) is decoded to find where it stops.
+        """
+        offsets:List[int] = []
+        size = os.path.getsize(path)
+        offset = 0
+        with open(path, 'rb') as f:
+            while offset < size:
+                f.seek(offset)
+                head = f.read(FRAME_HEADER_SIZE)
+                if len(head) == FRAME_HEADER_SIZE and head[0] == PROTO and head[1] >= 4 and head[2] == FRAME:
+                    end = offset + FRAME_HEADER_SIZE + int.from_bytes(head[3:], 'little')
+                    f.seek(end - 1)
+                    if end <= size and f.read(1) == STOP:
+                        offsets.append(offset)
+                        offset = end
+                        continue
+                f.seek(offset)
+                try:
+                    FrameUnpickler(f).load()
+                except (EOFError, pickle.UnpicklingError):
+                    break # Truncated pulse at the end of the file (same as read_raw)
+                offsets.append(offset)
+                offset = f.tell()
+        return np.array(offsets, dtype=np.int64)
+
+    def load_index(self, path:str) -> np.ndarray:
+        # The index is saved next to the file and rebuilt when the file changes
+        stat = os.stat(path)
+        index_path = self.index_path(path)
+        try:
+            with np.load(index_path, allow_pickle=False) as index:
+                if int(index['size']) == stat.st_size and int(index['mtime_ns']) == stat.st_mtime_ns:
+                    return index['offsets']
+        except (OSError, KeyError, ValueError):
+            pass # No index (or a broken one)
+
+        offsets = self.build_index(path)
+        try:
+            np.savez(index_path, offsets=offsets, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+        except OSError:
+            pass # Read-only directory, the index will be rebuilt next time
+        return offsets
+
+    def count_pulses(self, path:str) -> int:
+        return len(self.load_index(path))
+
+    def read(self, path:str, start:int=0, stop:int|None=None) -> Dict[str, np.ndarray]:
+        """
+        Decodes the pulses [start, stop[ of the file. Large ranges are divided
+        between worker processes.
+        """
+        offsets = self.load_index(path)[start:stop]
+        n_tasks = -(-len(offsets) // self.frames_per_task)
+        if n_tasks <= 1:
+            return decode_frames(path, offsets)
+
+        chunks = np.array_split(offsets, n_tasks)
+        parts = self.pool.run(decode_frames, {k: (path, chunk) for k, chunk in enumerate(chunks)})
+        return {name: np.concatenate([parts[k][name] for k in range(n_tasks)]) for name in parts[0]}
+
+    def iter_blocks(self, path:str, n_pulses:int) -> Iterator[Dict[str, np.ndarray]]:
+        # The index gives the pulses of each block directly
+        for start in range(0, self.count_pulses(path), n_pulses):
+            yield self.read(path, start, start + n_pulses)
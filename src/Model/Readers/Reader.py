@@ -0,0 +1,44 @@
+import numpy as np
+
+from typing import Dict, Iterator
+
+
+# Base class of the file formats that can be analysed (see FormatRegistry)
+# Every reader gives a dictionary of columns with at least 'SAMPLES' (one pulse per row)
+class Reader:
+    # Name shown to the user when the format is detected
+    name:str = "Unknown"
+    # Keep the decoded columns in the parse cache (useless for formats already memory-mapped)
+    use_cache:bool = True
+    # Column with the time of each record (None: the format doesn't save it) and its unit in ps
+    time_column:str|None = None
+    time_unit_ps:int = 1
+
+    # The other Reader classes must change this
+    def detect(self, head:bytes) -> bool:
+        """head: the first bytes of the file"""
+        return False
+
+    # The other Reader classes must change this
+    def read(self, path:str) -> Dict[str, np.ndarray]:
+        raise NotImplementedError
+
+    def iter_blocks(self, path:str, n_pulses:int) -> Iterator[Dict[str, np.ndarray]]:
+        # Formats that can't be read by parts are read completely, then sliced
+        columns = self.read(path)
+        for start in range(0, len(columns['SAMPLES']), n_pulses):
+            yield {name: column[start:start + n_pulses] for name, column in columns.items()}
+
+    def timestamps(self, columns:Dict[str, np.ndarray]) -> np.ndarray | None:
+        # Time of each record in ps (int64), None if the format or the file doesn't have it
+        if self.time_column is None or self.time_column not in columns:
+            return None
+        times = np.asarray(columns[self.time_column]).astype(np.int64)
+        if len(times) and not np.any(times): # Saved before the timestamps were kept
+            return None
+        times *= self.time_unit_ps
+        return times
+
+    def first_line(self, head:bytes) -> bytes:
+        # Used by the text formats to check their header
+        return head.removeprefix(b'\xef\xbb\xbf').split(b'\n', 1)[0].strip()
@@ -0,0 +1,24 @@
+import numpy as np
+
+from src.Model.Readers.Reader import Reader
+from src.Model.ShootFile import MAGIC, TIMESTAMP_TICK_PS, ShootFile
+
+from typing import Dict
+
+
+# Binary raw data saved by the program (see src/Model/ShootFile.py)
+class ShootFileReader(Reader):
+    name = "FLASHy raw data"
+    use_cache = False # Already memory-mapped
+    time_column = 'TIMESTAMP'
+    time_unit_ps = TIMESTAMP_TICK_PS
+
+    def __init__(self):
+        self.shoot_file = ShootFile()
+
+    def detect(self, head:bytes) -> bool:
+        return head.startswith(MAGIC)
+
+    def read(self, path:str) -> Dict[str, np.ndarray]:
+        info = self.shoot_file.read(path)
+        return {name: info[name] for name in ('FLAGS', 'TIMESTAMP', 'SAMPLES')}
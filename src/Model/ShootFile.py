@@ -0,0 +1,108 @@
+'''
+Binary format of the raw data of a shoot (one file per channel, saved as .dat)
+
+Everything is little-endian. The file starts with a 64 bytes header:
+
+    offset  type       name
+    0       8 bytes    magic (b'FLASHYWF')
+    8       uint16     version of the format
+    10      uint16     channel (0 or 1)
+    12      uint16     ADC_NBIT of the digitizer
+    14      uint16     reserved (0)
+    16      uint32     number of samples in each record
+    20      uint32     record length (ns)
+    24      uint64     number of records
+    32      32 bytes   sha256 of the parameters used for the shoot
+
+followed by three columns of n records, each one starting on a multiple of 64 bytes:
+
+    FLAGS      uint32[n]
+    TIMESTAMP  uint64[n]  (ticks of the digitizer clock, TIMESTAMP_TICK_PS)
+    SAMPLES    int16[n, samples per record]
+
+Every record has the same size, so the file can be opened with np.memmap without
+copying anything and the pulse k is found directly with SAMPLES[k].
+'''
+import struct
+import numpy as np
+
+from typing import Dict
+
+MAGIC = b'FLASHYWF'
+VERSION = 1
+HEADER = struct.Struct('<8sHHHHIIQ32s')
+ALIGNMENT = 64
+# TIMESTAMP of the digitizer (DPP-PHA of the x274x): ticks of 8 ns --> ps
+TIMESTAMP_TICK_PS = 8000
+
+
+def _align(offset:int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+class ShootFile:
+    def offsets(self, n_records:int, n_samples:int) -> Dict[str, int]:
+        # Where each column starts in the file
+        flags = _align(HEADER.size)
+        timestamp = _align(flags + 4 * n_records)
+        samples = _align(timestamp + 8 * n_records)
+        end = samples + 2 * n_records * n_samples
+        return {'FLAGS': flags, 'TIMESTAMP': timestamp, 'SAMPLES': samples, 'END': end}
+
+    def write(self, path:str, samples:np.ndarray, flags:np.ndarray, timestamps:np.ndarray,
+              channel:int, adc_n_bits:int, record_length_ns:int, parameters_hash:bytes=b''):
+        samples = np.asarray(samples, dtype='<i2')
+        if samples.ndim != 2: # No records
+            samples = samples.reshape(len(flags), 0)
+        n_records, n_samples = samples.shape
+        offsets = self.offsets(n_records, n_samples)
+
+        header = HEADER.pack(MAGIC, VERSION, channel, adc_n_bits, 0, n_samples,
+                             record_length_ns, n_records, parameters_hash.ljust(32, b'\0')[:32])
+        with open(path, 'wb') as f:
+            f.write(header)
+            for name, column in (('FLAGS', np.asarray(flags, dtype='<u4')),
+                                 ('TIMESTAMP', np.asarray(timestamps, dtype='<u8')),
+                                 ('SAMPLES', samples)):
+                f.write(b'\0' * (offsets[name] - f.tell())) # Padding
+                np.ascontiguousarray(column).tofile(f)
+
+    def read_header(self, path:str) -> Dict:
+        with open(path, 'rb') as f:
+            raw = f.read(HEADER.size)
+        if len(raw) < HEADER.size:
+            raise ValueError(f"'{path}' is too small to be a shoot file")
+        (magic, version, channel, adc_n_bits, _, n_samples,
+         record_length_ns, n_records, parameters_hash) = HEADER.unpack(raw)
+        if magic != MAGIC:
+            raise ValueError(f"'{path}' is not a shoot file")
+        if version > VERSION:
+            raise ValueError(f"'{path}' uses a newer version of the format ({version})")
+        return {
+            'VERSION'          : version,
+            'CHANNEL'          : channel,
+            'ADC_NBIT'         : adc_n_bits,
+            'N_SAMPLES'        : n_samples,
+            'RECORD_LENGTH_NS' : record_length_ns,
+            'N_RECORDS'        : n_records,
+            'PARAMETERS_HASH'  : parameters_hash,
+        }
+
+    def read(self, path:str) -> Dict:
+        """
+        Opens the columns of the file with np.memmap (nothing is read until it's used).
+        Returns the header values and the FLAGS, TIMESTAMP and SAMPLES columns.
+        """
+        info:Dict = self.read_header(path)
+        n_records, n_samples = info['N_RECORDS'], info['N_SAMPLES']
+        offsets = self.offsets(n_records, n_samples)
+        if n_records == 0:
+            info['FLAGS'] = np.zeros(0, dtype='<u4')
+            info['TIMESTAMP'] = np.zeros(0, dtype='<u8')
+            info['SAMPLES'] = np.zeros((0, n_samples), dtype='<i2')
+            return info
+
+        info['FLAGS'] = np.memmap(path, dtype='<u4', mode='r', offset=offsets['FLAGS'], shape=(n_records,))
+        info['TIMESTAMP'] = np.memmap(path, dtype='<u8', mode='r', offset=offsets['TIMESTAMP'], shape=(n_records,))
+        info['SAMPLES'] = np.memmap(path, dtype='<i2', mode='r', offset=offsets['SAMPLES'], shape=(n_records, n_samples))
+        return info
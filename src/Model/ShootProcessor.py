@@ -0,0 +1,89 @@
+import os
+import csv
+import numpy as np
+
+from src.Model.AnalysisSettings import AnalysisSettings
+from src.Model.DataAnalyser import DataAnalyser
+from src.Model.ShootFile import ShootFile
+from src.Model.WorkerPool import WorkerPool
+
+from typing import Any, Callable, Dict, List
+
+# Records of a shoot under which the channels are done one after the other in this process
+# (starting the worker processes takes longer than analysing them)
+MIN_RECORDS = 2000
+
+
+def save_raw_data(path:str, pulses:List[list], channel:str, settings:AnalysisSettings, parameters_hash:bytes):
+    # See src/Model/ShootFile.py for the format of the file
+    flags = np.array([int(str(pulse[1]), 0) for pulse in pulses], dtype=np.uint32)
+    timestamps = np.array([int(str(pulse[4])) for pulse in pulses], dtype=np.uint64)
+    samples = np.array([pulse[3] for pulse in pulses], dtype=np.int16)
+    ShootFile().write(
+        path, samples, flags, timestamps, channel=int(channel[-1]), adc_n_bits=settings.get_ADC_NBIT(),
+        record_length_ns=int(settings.get_rcd_len()), parameters_hash=parameters_hash)
+
+def save_to_csv(path:str, pulses:List[list]):
+    # Read by FLASHyCSVReader
+    with open(path, 'w', newline='') as f:
+        writter = csv.writer(f)
+        writter.writerow(['Channel', 'Flag', 'Waveform_size', 'Timestamp', 'Samples'])
+        for pulse in pulses:
+            writter.writerow([pulse[0], pulse[1], pulse[2], pulse[4], pulse[3].tolist()])
+
+def process_channel(channel:str, pulses:List[list], settings:AnalysisSettings,
+                    directory:str, name:str, parameters_hash:bytes) -> Dict[str, Any]:
+    """
+    Saves the raw data of one channel, selects its valid pulses (saved as csv) and analyses them.
+    pulses: [[channel, flag, waveform_size, samples, timestamp], ...] (see Controller.post_acquisition)
+    Returns the results of the analysis (see DataAnalyser.get_results, None if there's no pulse)
+    and the feedback of the channel.
+    Module level function so it can be sent to the worker processes (see WorkerPool).
+    """
+    # The feedback of each channel is kept apart
+    settings = AnalysisSettings(settings.values)
+    analyser = DataAnalyser(settings)
+    result:Dict[str, Any] = {'channel': channel, 'results': None, 'feedback': settings.feedback}
+    try:
+        save_raw_data(os.path.join(directory, f"{name}_{channel}.dat"), pulses, channel, settings, parameters_hash)
+    except Exception as e:
+        settings.send_feedback('failed saving raw data')
+        settings.send_feedback(e.__str__())
+
+    # Every record has the same length, they are all cleaned at once (and only once, see DataAnalyser.analyse_records)
+    samples = np.array([pulse[3][:int(pulse[2])] for pulse in pulses], dtype=np.int16)
+    valid = analyser.valid_records(samples)
+    settings.send_feedback(f"{channel}: {analyser.rejection_feedback()}")
+    try:
+        save_to_csv(os.path.join(directory, f"{name}_{channel}-DETECTED.csv"),
+                    [pulse for pulse, is_pulse in zip(pulses, valid) if is_pulse])
+    except Exception as e:
+        settings.send_feedback('failed csv save')
+        settings.send_feedback(e.__str__())
+
+    try:
+        analyser.analyse_records(pulses, samples, valid)
+    except IndexError: # There's no pulse
+        return result
+    result['results'] = analyser.get_results()
+    return result
+
+
+# Saves, selects and analyses the pulses of each channel of a shoot, the channels at the same time
+class ShootProcessor:
+    def __init__(self, workers:int|None=None, min_records:int=MIN_RECORDS):
+        # One channel per worker process (None: one per core)
+        self.pool = WorkerPool(workers)
+        self.min_records = min_records
+
+    def process(self, channels:Dict[str, List[list]], settings:AnalysisSettings, directory:str, name:str,
+                parameters_hash:bytes, done:Callable[[Dict[str, Any]], None]|None=None) -> Dict[str, Dict[str, Any]]:
+        """
+        channels: {'CH0': pulses, 'CH1': pulses}, one worker process per channel (see process_channel)
+        done is called (in this process) every time a channel is done, to show its results.
+        Returns the result of each channel
+        """
+        n_records = sum(len(pulses) for pulses in channels.values())
+        tasks = {channel: (channel, pulses, settings, directory, name, parameters_hash)
+                 for channel, pulses in channels.items()}
+        return self.pool.run(process_channel, tasks, done, in_process=n_records < self.min_records)
@@ -0,0 +1,17 @@
+import numpy as np
+
+from src.Model.Stages.Stage import Stage
+
+
+# Converts the charge of each pulse into a dose
+class DoseModel(Stage):
+    kind = "dose"
+
+    # The other DoseModel classes must change this
+    def dose(self, area:np.ndarray, dose_factor:float) -> np.ndarray:
+        """
+        area: charge of each pulse (in nC)
+        dose_factor: Facteur de conversion: [nC] --> [cGy]
+        Returns the dose of each pulse (in cGy)
+        """
+        raise NotImplementedError
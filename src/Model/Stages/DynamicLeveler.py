@@ -0,0 +1,87 @@
+import numpy as np
+
+from src.Model.Stages.Leveler import Leveler
+from src.Model.Stages.Kernels import jit_kernels
+from src.Model.Stages.IntegerHistogram import IntegerHistogram
+
+from typing import Tuple
+
+
+# Base of the levelers that find the baseline outside of the pulse (see DynamicMeanLeveler and DynamicMedianLeveler)
+class DynamicLeveler(Leveler):
+    # Name of the compiled kernel of the statistic (see Kernels), "" if there's none
+    kernel:str = ""
+
+    def __init__(self, use_jit:bool=True):
+        super().__init__(use_jit)
+        # For the median and the mode of the integer samples
+        self.histogram = IntegerHistogram()
+
+    def baseline(self, block:np.ndarray, repeat:int) -> np.ndarray:
+        """
+        The baseline is the mean (or median) of the samples outside of the pulse (see Leveler.bonds),
+        without any copy of the pulses filled with NaN.
+        block: raw pulses (integers)
+        """
+        return self.bonds_baseline(block, repeat, *self.bonds(block, repeat))
+
+    def baseline_and_window(self, block:np.ndarray, repeat:int) -> Tuple[np.ndarray, Tuple[np.ndarray, np.ndarray]]:
+        # The bonds are only found once
+        left_bond, right_bond = self.bonds(block, repeat)
+        return self.bonds_baseline(block, repeat, left_bond, right_bond), self.bond_window(left_bond, right_bond, repeat)
+
+    def bonds_baseline(self, block:np.ndarray, repeat:int, left_bond:np.ndarray, right_bond:np.ndarray) -> np.ndarray:
+        # Do mean or median of the record samples outside [left_bond, right_bond[ (and not the last one)
+        kernels = jit_kernels() if self.use_jit else None
+        if kernels is not None and self.kernel:
+            baseline = np.empty(len(block))
+            getattr(kernels, self.kernel)(np.ascontiguousarray(block), repeat, left_bond, right_bond, baseline)
+            return baseline
+        return self.statistic(block, repeat, left_bond, right_bond)
+    
+    # The other DynamicLeveler classes must change this
+    def statistic(self, block:np.ndarray, repeat:int, left_bond:np.ndarray, right_bond:np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+    
+    def baseline_mean(self, block:np.ndarray, repeat:int, left_bond:np.ndarray, right_bond:np.ndarray) -> np.ndarray:
+        # prefix[:, i]: sum of the i first samples kept (exact, with integers)
+        rows = np.arange(len(block))
+        n_samples = block.shape[1]
+        prefix = np.zeros((len(block), n_samples + 1), dtype=np.int64)
+        prefix[:, 1:] = block
+        np.cumsum(prefix[:, 1:], axis=1, out=prefix[:, 1:])
+        
+        def record_sum(col):
+            # Sum of the record samples [0, col[ (each sample kept stands for repeat samples of the record)
+            i = col // repeat
+            return repeat * prefix[rows, i] + (col % repeat) * block[rows, np.minimum(i, n_samples - 1)]
+        
+        n_record = n_samples * repeat
+        total = record_sum(np.full(len(block), n_record - 1)) - (record_sum(right_bond) - record_sum(left_bond))
+        count = n_record - 1 - (right_bond - left_bond)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return total / count
+    
+    def baseline_weights(self, block:np.ndarray, repeat:int, left_bond:np.ndarray, right_bond:np.ndarray) -> np.ndarray:
+        # Number of times each sample kept is in the baseline (int8, 0 to repeat)
+        rows = np.arange(len(block))
+        cols = np.arange(block.shape[1])
+        weights = np.full(block.shape, repeat, dtype=np.int8)
+        first = left_bond // repeat
+        last  = (right_bond - 1) // repeat
+        weights[(cols > first[:, None]) & (cols < last[:, None])] = 0
+        # The samples kept at the bonds can be partly in the pulse
+        empty = right_bond <= left_bond
+        for bond in (first, last):
+            overlap = np.clip(np.minimum(bond * repeat + repeat, right_bond) - np.maximum(bond * repeat, left_bond), 0, repeat)
+            overlap[empty] = 0
+            weights[rows, bond] = repeat - overlap
+        weights[:, -1] -= 1
+        return weights
+    
+    def baseline_median(self, block:np.ndarray, repeat:int, left_bond:np.ndarray, right_bond:np.ndarray) -> np.ndarray:
+        # Median of the histogram of the samples outside of the pulse (see IntegerHistogram)
+        return self.histogram.median(block, self.baseline_weights(block, repeat, left_bond, right_bond))
+    
+    def baseline_mode(self, block:np.ndarray, repeat:int, left_bond:np.ndarray, right_bond:np.ndarray) -> np.ndarray:
+        return self.histogram.mode(block, self.baseline_weights(block, repeat, left_bond, right_bond))
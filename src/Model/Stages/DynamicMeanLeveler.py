@@ -0,0 +1,12 @@
+import numpy as np
+
+from src.Model.Stages.DynamicLeveler import DynamicLeveler
+
+
+class DynamicMeanLeveler(DynamicLeveler):
+    name = "dynamic-mean"
+    description = "Calcule la dérivée du pulse pour trouver le début et la fin du pulse. Trouve la moyenne des points hors-pulse et l'utilise pour mettre à zéro."
+    kernel = "baseline_mean"
+
+    def statistic(self, block:np.ndarray, repeat:int, left_bond:np.ndarray, right_bond:np.ndarray) -> np.ndarray:
+        return self.baseline_mean(block, repeat, left_bond, right_bond)
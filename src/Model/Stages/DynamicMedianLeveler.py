@@ -0,0 +1,12 @@
+import numpy as np
+
+from src.Model.Stages.DynamicLeveler import DynamicLeveler
+
+
+class DynamicMedianLeveler(DynamicLeveler):
+    name = "dynamic-median"
+    description = "Calcule la dérivée du pulse pour trouver le début et la fin du pulse. Trouve la médianne des points hors-pulse et l'utilise pour mettre à zéro."
+    kernel = "baseline_median"
+
+    def statistic(self, block:np.ndarray, repeat:int, left_bond:np.ndarray, right_bond:np.ndarray) -> np.ndarray:
+        return self.baseline_median(block, repeat, left_bond, right_bond)
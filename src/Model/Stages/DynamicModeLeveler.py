@@ -0,0 +1,11 @@
+import numpy as np
+
+from src.Model.Stages.DynamicLeveler import DynamicLeveler
+
+
+class DynamicModeLeveler(DynamicLeveler):
+    name = "dynamic-mode"
+    description = "Calcule la dérivée du pulse pour trouver le début et la fin du pulse. Trouve la valeur la plus fréquente des points hors-pulse et l'utilise pour mettre à zéro."
+
+    def statistic(self, block:np.ndarray, repeat:int, left_bond:np.ndarray, right_bond:np.ndarray) -> np.ndarray:
+        return self.baseline_mode(block, repeat, left_bond, right_bond)
@@ -0,0 +1,25 @@
+import numpy as np
+
+from src.Model.Stages.Integrator import Integrator
+
+from typing import Tuple
+
+
+# Arthur's method: High Resolution Method Approximation
+class HRMIntegrator(Integrator):
+    name = "approx-HRM"
+    description = "Somme de toutes les points multipliée par dt (High Resolution Method)"
+    uses_counts = True
+
+    def area(self, pulses:np.ndarray, repeat:int, dt:float,
+             window:Tuple[np.ndarray, np.ndarray]|None=None, rows:np.ndarray|None=None) -> np.ndarray:
+        if window is not None or rows is not None:
+            return self.window_sums(pulses, window, np.float64, rows)[0] * dt
+        return np.sum(pulses, axis=1, dtype=np.float64) * dt
+
+    def area_counts(self, block:np.ndarray, baseline:np.ndarray, repeat:int,
+                    window:Tuple[np.ndarray, np.ndarray]|None=None, rows:np.ndarray|None=None) -> np.ndarray:
+        if window is not None or rows is not None:
+            sums, _, _, length = self.window_sums(block, window, np.int64, rows)
+            return sums - baseline * length
+        return np.sum(block, axis=1, dtype=np.int64) - baseline * block.shape[1]
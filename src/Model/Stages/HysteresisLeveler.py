@@ -0,0 +1,39 @@
+import numpy as np
+
+from src.Model.Stages.DynamicLeveler import DynamicLeveler
+from src.Model.Stages.PulseDetector import PulseDetector
+
+from typing import Tuple
+
+
+# The pulse is found with thresholds scaled to the noise of each record (see PulseDetector)
+# instead of a fixed threshold on the derivative
+class HysteresisLeveler(DynamicLeveler):
+    name = "hysteresis-mean"
+    description = "Trouve le pulse avec deux seuils proportionnels au bruit de chaque enregistrement (hystérésis). Trouve la moyenne des points hors-pulse et l'utilise pour mettre à zéro."
+    kernel = "baseline_mean"
+
+    def __init__(self, use_jit:bool=True):
+        super().__init__(use_jit)
+        self.detector = PulseDetector()
+
+    def statistic(self, block:np.ndarray, repeat:int, left_bond:np.ndarray, right_bond:np.ndarray) -> np.ndarray:
+        return self.baseline_mean(block, repeat, left_bond, right_bond)
+
+    def bonds(self, block:np.ndarray, repeat:int) -> Tuple[np.ndarray, np.ndarray]:
+        start, _, end, _ = self.detector.detect(block)
+        return self.record_bonds(start, end, repeat, block.shape[1])
+
+    def window(self, block:np.ndarray, repeat:int) -> Tuple[np.ndarray, np.ndarray]:
+        start, _, end, _ = self.detector.detect(block)
+        return start, end
+
+    def baseline_and_window(self, block:np.ndarray, repeat:int) -> Tuple[np.ndarray, Tuple[np.ndarray, np.ndarray]]:
+        # The pulses are only detected once
+        start, _, end, _ = self.detector.detect(block)
+        baseline = self.bonds_baseline(block, repeat, *self.record_bonds(start, end, repeat, block.shape[1]))
+        return baseline, (start, end)
+
+    def record_bonds(self, start:np.ndarray, end:np.ndarray, repeat:int, n_samples:int) -> Tuple[np.ndarray, np.ndarray]:
+        # Samples kept [start, end[ --> columns of the record (the last one is never in the baseline)
+        return start * repeat, np.minimum(end * repeat, n_samples * repeat - 1)
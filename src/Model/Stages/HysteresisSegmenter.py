@@ -0,0 +1,69 @@
+import numpy as np
+
+from src.Model.Stages.Segmenter import Segmenter
+from src.Model.Stages.PulseDetector import PulseDetector
+
+from typing import Tuple
+
+
+# Every pulse of the record with the thresholds of the PulseDetector (scaled to the noise):
+# each run of samples over the low threshold is a pulse if its peak is over the high threshold.
+# Runs closer than min_gap are the same pulse (the noise on its edges crosses the low threshold)
+# and a pulse must be at least a fraction of the highest pulse of its record (the slow drifts
+# of the baseline after a pulse are bigger than the noise of the derivative).
+# The runs of all the records are found at once in the flat block (no loop on the records).
+class HysteresisSegmenter(Segmenter):
+    name = "hysteresis"
+    description = "Sépare les pulses empilés d'un même enregistrement: chaque passage au-dessus du seuil bas (proportionnel au bruit) dont le maximum dépasse le seuil haut est un pulse"
+    splits = True
+
+    def __init__(self, min_gap:int=4, min_fraction:float=0.05):
+        self.detector = PulseDetector()
+        # Samples kept under the low threshold between two pulses
+        self.min_gap = min_gap
+        # Smallest peak of a pulse (fraction of the highest one of the record)
+        self.min_fraction = min_fraction
+
+    def segment(self, block:np.ndarray, baseline:np.ndarray, repeat:int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        n_pulses, n_samples = block.shape
+        if n_pulses == 0 or n_samples == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty
+        sigma = self.detector.noise(block)
+        signal = block - baseline[:, np.newaxis]
+        # Polarity of the pulses of each record (its highest sample), so the undershoot
+        # after a pulse isn't taken as another pulse
+        rows = np.arange(n_pulses)
+        peak = signal[rows, np.argmax(np.abs(signal), axis=1)]
+        signal *= np.sign(peak)[:, np.newaxis]
+
+        # A sample under the threshold on both sides of each record, so the runs never go from one record to the next
+        width = n_samples + 2
+        above = np.zeros((n_pulses, width), dtype=np.int8)
+        above[:, 1:-1] = signal > (self.detector.low * sigma)[:, np.newaxis]
+        edges = np.diff(above.reshape(-1))
+        # First sample of each run and the one after its last sample (in the padded flat block)
+        first = np.flatnonzero(edges == 1) + 1
+        stop = np.flatnonzero(edges == -1) + 1
+        del above, edges
+        record = first // width
+        start = first % width - 1
+        end = stop % width - 1
+        if len(record) == 0:
+            return record, start, end
+        # Runs of the same record too close to each other are joined
+        joined = (record[1:] == record[:-1]) & (start[1:] - end[:-1] < self.min_gap)
+        first_run = np.concatenate(([True], ~joined))
+        last_run = np.concatenate((~joined, [True]))
+        record, start, end = record[first_run], start[first_run], end[last_run]
+
+        # Highest sample of each run: reduceat on [start, end[ of the flat signal, the segments between them are dropped
+        bounds = np.empty(2 * len(record), dtype=np.int64)
+        bounds[0::2] = record * n_samples + start
+        bounds[1::2] = record * n_samples + end
+        flat = signal.reshape(-1)
+        if bounds[-1] == flat.size:
+            bounds = bounds[:-1]
+        height = np.maximum.reduceat(flat, bounds)[0::2]
+        found = (height > self.detector.high * sigma[record]) & (height >= self.min_fraction * np.abs(peak)[record])
+        return record[found], start[found], end[found]
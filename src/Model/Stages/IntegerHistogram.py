@@ -0,0 +1,84 @@
+import numpy as np
+
+from typing import Iterator, Tuple
+
+# Number of bins of the histograms made at once (float64)
+MAX_BINS = 1 << 20
+
+
+# Median and mode of each row of integer values (the ADC gives 14 bits integers) from the
+# histogram of the row: one np.bincount for all the rows and no sort.
+# The bins of a row go from its smallest to its largest value, so a baseline with a few LSB
+# of noise only needs a few bins. The histograms of all the rows are one after the other in
+# a single array, the median is found in it with np.searchsorted.
+class IntegerHistogram:
+    def __init__(self, max_bins:int=MAX_BINS):
+        self.max_bins = max_bins
+
+    def median(self, values:np.ndarray, weights:np.ndarray|None=None) -> np.ndarray:
+        """
+        values: integers (one row per pulse), weights: number of times each value counts (None: once)
+        Returns the median of each row (mean of the two middle values, NaN if nothing counts)
+        """
+        median = np.full(len(values), np.nan)
+        for rows, low, offsets, counts in self.histograms(values, weights):
+            cumulative = np.cumsum(counts)
+            before = np.concatenate(([0], cumulative))[offsets]
+            total = np.concatenate((cumulative[offsets[1:] - 1], cumulative[-1:])) - before
+            # The two middle values (the same one when total is odd)
+            middle_low  = np.searchsorted(cumulative, before + (total - 1) // 2, side='right')
+            middle_high = np.searchsorted(cumulative, before + total // 2, side='right')
+            found = total > 0
+            median[rows[found]] = low[found] + ((middle_low + middle_high) / 2 - offsets)[found]
+        return median
+
+    def mode(self, values:np.ndarray, weights:np.ndarray|None=None) -> np.ndarray:
+        # Most frequent value of each row (the smallest one if there are many), NaN if nothing counts
+        mode = np.full(len(values), np.nan)
+        for rows, low, offsets, counts in self.histograms(values, weights):
+            highest = np.maximum.reduceat(counts, offsets)
+            spans = np.diff(np.concatenate((offsets, [len(counts)])))
+            # First bin of each row with the highest count
+            tops = np.flatnonzero(counts == np.repeat(highest, spans))
+            first = tops[np.searchsorted(tops, offsets)]
+            found = highest > 0
+            mode[rows[found]] = (low + first - offsets)[found]
+        return mode
+
+    def histograms(self, values:np.ndarray, weights:np.ndarray|None) -> Iterator[Tuple[np.ndarray, ...]]:
+        """
+        Histograms of the rows, as many rows at a time as fit in max_bins.
+        Gives the rows, their smallest value, where their histogram starts and the histograms
+        """
+        values = np.asarray(values)
+        if values.ndim != 2 or values.shape[1] == 0:
+            return
+        # Range of the values that count
+        if weights is None:
+            low = values.min(axis=1).astype(np.int64)
+            high = values.max(axis=1).astype(np.int64)
+        else:
+            counted = weights > 0
+            low = np.where(counted, values, np.iinfo(values.dtype).max).min(axis=1).astype(np.int64)
+            high = np.where(counted, values, np.iinfo(values.dtype).min).max(axis=1).astype(np.int64)
+            # Rows where nothing counts: one empty bin
+            empty = low > high
+            low[empty] = high[empty] = 0
+        spans = high - low + 1
+
+        # Rows of each group of histograms (a row alone can have more than max_bins)
+        ends = np.cumsum(spans)
+        start = 0
+        while start < len(values):
+            stop = max(int(np.searchsorted(ends, ends[start] - spans[start] + self.max_bins, side='right')), start + 1)
+            rows = np.arange(start, stop)
+            offsets = np.concatenate(([0], np.cumsum(spans[start:stop - 1])))
+            # Bin of each value in the histograms (the values that don't count are clipped, their weight is 0)
+            keys = values[start:stop] - low[start:stop, np.newaxis]
+            if weights is not None:
+                np.clip(keys, 0, spans[start:stop, np.newaxis] - 1, out=keys)
+            keys += offsets[:, np.newaxis]
+            counts = np.bincount(keys.ravel(), None if weights is None else weights[start:stop].ravel(),
+                                 minlength=int(spans[start:stop].sum()))
+            yield rows, low[start:stop], offsets, counts
+            start = stop
@@ -0,0 +1,68 @@
+import numpy as np
+
+from src.Model.Stages.Stage import Stage
+
+from typing import Tuple
+
+
+# Calculates the area under each leveled pulse
+class Integrator(Stage):
+    kind = "integrator"
+    # The integrators that only integrate the pulse need its window (see Leveler.window)
+    uses_window:bool = False
+    # The integrators that can integrate the raw pulses directly (see area_counts)
+    uses_counts:bool = False
+
+    # The other Integrator classes must change this
+    def area(self, pulses:np.ndarray, repeat:int, dt:float,
+             window:Tuple[np.ndarray, np.ndarray]|None=None, rows:np.ndarray|None=None) -> np.ndarray:
+        """
+        pulses: leveled pulses (in V), each sample kept stands for repeat samples of the record
+        dt: spacing between the samples kept (in µs)
+        window: samples kept [start, stop[ of each pulse (with the margin), if uses_window or
+                when a record has many pulses (see Segmenter)
+        rows: record of each window, when a record has many pulses (one window per record if None)
+        Returns the area of each pulse (in V*µs), the sums are always done in float64
+        """
+        raise NotImplementedError
+
+    def area_counts(self, block:np.ndarray, baseline:np.ndarray, repeat:int,
+                    window:Tuple[np.ndarray, np.ndarray]|None=None, rows:np.ndarray|None=None) -> np.ndarray:
+        """
+        Same area as area, from the raw pulses and their baseline, for the levelers that only
+        remove the baseline (see Leveler.linear). The counts are added exactly (int64) and the
+        baseline is removed from each sum, no leveled pulse is made.
+        block: raw pulses (integers), baseline: in LSB (of each window if rows is given)
+        Returns the area of each pulse in LSB * samples kept (* lsb2v * dt --> V*µs)
+        """
+        raise NotImplementedError
+
+    def window_sums(self, pulses:np.ndarray, window:Tuple[np.ndarray, np.ndarray]|None,
+                    dtype:type, rows:np.ndarray|None=None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        # Sum, first and last sample and number of samples of each window
+        # rows: pulse of each window (one window per pulse if None), ordered like the flat pulses
+        n_pulses, n_samples = pulses.shape
+        if rows is None:
+            rows = np.arange(n_pulses)
+        if len(rows) == 0 or n_samples == 0:
+            empty = np.zeros(len(rows), dtype=dtype)
+            return empty, empty, empty, np.zeros(len(rows), dtype=np.int64)
+        if window is None: # The whole record
+            start = np.zeros(len(rows), dtype=np.int64)
+            stop = np.full(len(rows), n_samples, dtype=np.int64)
+        else:
+            start, stop = window
+        # Sum of each window: segments of the flat pulses, only the samples inside them are added
+        # (reduceat adds [bounds[k], bounds[k + 1][, the segments between the windows are dropped)
+        offsets = rows * n_samples
+        bounds = np.empty(2 * len(rows), dtype=np.int64)
+        bounds[0::2] = offsets + start
+        bounds[1::2] = offsets + stop
+        flat = pulses.reshape(-1)
+        # The end of the last window can be the end of the pulses (reduceat goes there by itself)
+        if bounds[-1] == flat.size:
+            bounds = bounds[:-1]
+        sums = np.add.reduceat(flat, bounds, dtype=dtype)[0::2]
+        first = pulses[rows, start].astype(dtype)
+        last  = pulses[rows, stop - 1].astype(dtype)
+        return sums, first, last, stop - start
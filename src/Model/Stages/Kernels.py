@@ -0,0 +1,90 @@
+'''
+Compiled kernels of the dynamic levelers (optional, with Numba)
+
+NumPy needs many passes over the whole block to find the bonds of the pulses and the
+baseline outside of them (derivative, mask, argmax, prefix sums, bisection). These
+kernels do it row by row in one loop, without any temporary the size of the block.
+They give exactly the same results as the NumPy path of DynamicLeveler, which is used
+when Numba isn't installed (pip install numba).
+'''
+import numpy as np
+
+from types import SimpleNamespace
+
+# Compiled kernels, False when Numba isn't installed (see jit_kernels)
+_compiled:SimpleNamespace|bool|None = None
+
+
+def find_bonds(block:np.ndarray, limit:float, repeat:int, left_bond:np.ndarray, right_bond:np.ndarray):
+    # First and last sample where |derivative| > limit, in the columns of the record
+    n_rows, n_samples = block.shape
+    for i in range(n_rows):
+        first = -1
+        last = 0
+        for j in range(n_samples - 1):
+            if abs(np.int64(block[i, j + 1]) - np.int64(block[i, j])) > limit:
+                first = j
+                break
+        if first < 0: # No pulse found: the whole record is the baseline
+            first = 0
+        else:
+            for j in range(n_samples - 2, first - 1, -1):
+                if abs(np.int64(block[i, j + 1]) - np.int64(block[i, j])) > limit:
+                    last = j
+                    break
+        if last < first:
+            last = first
+        left_bond[i] = first * repeat + repeat - 1
+        right_bond[i] = last * repeat + repeat - 1
+
+
+def baseline_mean(block:np.ndarray, repeat:int, left_bond:np.ndarray, right_bond:np.ndarray, out:np.ndarray):
+    n_rows, n_samples = block.shape
+    for i in range(n_rows):
+        total = np.int64(0)
+        count = 0
+        for col in range(n_samples):
+            # Number of record samples of the sample kept outside [left_bond, right_bond[ (and not the last one)
+            overlap = min(col * repeat + repeat, right_bond[i]) - max(col * repeat, left_bond[i])
+            weight = repeat - max(overlap, 0) - (col == n_samples - 1)
+            total += weight * np.int64(block[i, col])
+            count += weight
+        out[i] = total / count if count > 0 else np.nan
+
+
+def baseline_median(block:np.ndarray, repeat:int, left_bond:np.ndarray, right_bond:np.ndarray, out:np.ndarray):
+    n_rows, n_samples = block.shape
+    values = np.empty(n_samples * repeat, dtype=np.int64)
+    for i in range(n_rows):
+        count = 0
+        for col in range(n_samples):
+            overlap = min(col * repeat + repeat, right_bond[i]) - max(col * repeat, left_bond[i])
+            weight = repeat - max(overlap, 0) - (col == n_samples - 1)
+            for _ in range(weight):
+                values[count] = block[i, col]
+                count += 1
+        if count == 0:
+            out[i] = np.nan
+            continue
+        kept = np.sort(values[:count])
+        out[i] = (kept[(count - 1) // 2] + kept[count // 2]) / 2
+
+
+def jit_kernels() -> SimpleNamespace | None:
+    """
+    The kernels compiled with Numba (the first time they are asked for, so the program
+    starts as fast without them). Returns None when Numba isn't installed.
+    """
+    global _compiled
+    if _compiled is None:
+        try:
+            import numba
+        except ImportError:
+            _compiled = False
+        else:
+            _compiled = SimpleNamespace(
+                find_bonds      = numba.njit(cache=True)(find_bonds),
+                baseline_mean   = numba.njit(cache=True)(baseline_mean),
+                baseline_median = numba.njit(cache=True)(baseline_median),
+            )
+    return _compiled or None
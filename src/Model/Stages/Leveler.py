@@ -0,0 +1,84 @@
+import numpy as np
+
+from src.Model.Stages.Stage import Stage
+from src.Model.Stages.Kernels import jit_kernels
+
+from typing import Tuple
+
+
+# Finds the baseline of each pulse and brings it to zero
+class Leveler(Stage):
+    kind = "leveler"
+    # level only removes the baseline and converts to V, so the pulses can be integrated
+    # from the raw counts (see Integrator.area_counts)
+    linear:bool = True
+
+    def __init__(self, use_jit:bool=True):
+        # Use the compiled kernels when Numba is installed (see Kernels)
+        self.use_jit = use_jit
+
+    # The other Leveler classes must change this
+    def baseline(self, block:np.ndarray, repeat:int) -> np.ndarray:
+        """
+        block: raw pulses (integers), each sample kept stands for repeat samples of the record
+        Returns the baseline of each pulse (in LSB)
+        """
+        raise NotImplementedError
+
+    def baseline_and_window(self, block:np.ndarray, repeat:int) -> Tuple[np.ndarray, Tuple[np.ndarray, np.ndarray]]:
+        # For the integrators that only integrate the pulse (see Integrator.uses_window)
+        return self.baseline(block, repeat), self.window(block, repeat)
+
+    def window(self, block:np.ndarray, repeat:int) -> Tuple[np.ndarray, np.ndarray]:
+        return self.bond_window(*self.bonds(block, repeat), repeat)
+
+    def bond_window(self, left_bond:np.ndarray, right_bond:np.ndarray, repeat:int) -> Tuple[np.ndarray, np.ndarray]:
+        # Samples kept [start, stop[ from the first to the last big variation of each pulse
+        start = (left_bond - repeat + 1) // repeat
+        stop = (right_bond - repeat + 1) // repeat + 2
+        return start, stop
+
+    def bonds(self, block:np.ndarray, repeat:int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The derivative of the pulse gives where it starts and ends, without any float
+        derivative: only one matrix the size of the block is used at a time.
+        block: raw pulses (integers)
+        Returns the first and last column of the record where |derivative| > threshold
+        """
+        # THIS IS VERY IMPORTANT (AND TOOK TOO LONG TO FIND)
+        variation = 10 # Interval at which the digitizer samples data (ie 10 per nanoseconds)
+        threshold = 1.0 # This is found manually
+        # |derivative| > threshold  <=>  |right - left| > threshold * variation
+        # (the derivative between the repeated samples is 0, only the other ones are kept)
+        kernels = jit_kernels() if self.use_jit else None
+        if kernels is not None:
+            # One loop over each row, same results as below
+            left_bond = np.empty(len(block), dtype=np.int64)
+            right_bond = np.empty(len(block), dtype=np.int64)
+            kernels.find_bonds(np.ascontiguousarray(block), threshold * variation, repeat, left_bond, right_bond)
+            return left_bond, right_bond
+
+        deriver = np.diff(block, axis=1)
+        np.abs(deriver, out=deriver)
+        dervier_mask = deriver > threshold * variation
+        del deriver
+        
+        # First and last point of the derivative over the threshold
+        rows = np.arange(len(block))
+        left_bond  = np.argmax(dervier_mask, axis=1)
+        right_bond = dervier_mask.shape[1] - 1 - np.argmax(dervier_mask[:, ::-1], axis=1)
+        # No pulse found: the whole record is the baseline
+        flat = ~dervier_mask[rows, left_bond]
+        right_bond[flat] = left_bond[flat]
+        del dervier_mask
+        # Bonds in the columns of the record
+        left_bond  = left_bond * repeat + repeat - 1
+        right_bond = right_bond * repeat + repeat - 1
+        return left_bond, right_bond
+
+    def level(self, block:np.ndarray, baseline:np.ndarray, lsb2v:float, dtype:np.dtype=np.float64) -> np.ndarray:
+        # Bring values close to zero (dtype: working precision of the leveled pulses)
+        pulses = np.subtract(block, baseline[:, np.newaxis], dtype=dtype)
+        # [LSB] --> [V]
+        pulses *= lsb2v
+        return pulses
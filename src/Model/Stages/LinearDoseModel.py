@@ -0,0 +1,11 @@
+import numpy as np
+
+from src.Model.Stages.DoseModel import DoseModel
+
+
+class LinearDoseModel(DoseModel):
+    name = "linear"
+    description = "La dose est proportionnelle à la charge (charge * facteur de conversion [nC] --> [cGy])"
+
+    def dose(self, area:np.ndarray, dose_factor:float) -> np.ndarray:
+        return area * dose_factor
@@ -0,0 +1,28 @@
+import numpy as np
+
+from src.Model.Stages.Leveler import Leveler
+
+
+class MedianLeveler(Leveler):
+    name = "median"
+    description = "Prend les 200 premiers points et utilise sa médianne pour mettre à zéro"
+    # The values close to the baseline are also set to 0
+    linear = False
+
+    def __init__(self, use_jit:bool=True):
+        super().__init__(use_jit)
+        # Values closer than this to the baseline are set to 0 (in LSB)
+        self.threshold = 8
+
+    def baseline(self, block:np.ndarray, repeat:int) -> np.ndarray:
+        # Calculate de median of each pulse (the 200 first samples of the record)
+        return np.median(block[:, :200 // repeat], axis=1)
+
+    def level(self, block:np.ndarray, baseline:np.ndarray, lsb2v:float, dtype:np.dtype=np.float64) -> np.ndarray:
+        # Bring values close to zero
+        pulses = np.subtract(block, baseline[:, np.newaxis], dtype=dtype)
+        # Bring value to zero if lower than threshold
+        pulses[np.abs(pulses) < self.threshold] = 0
+        # [LSB] --> [V]
+        pulses *= lsb2v
+        return pulses
@@ -0,0 +1,18 @@
+import numpy as np
+
+from src.Model.Stages.MedianLeveler import MedianLeveler
+from src.Model.Stages.IntegerHistogram import IntegerHistogram
+
+
+class ModeLeveler(MedianLeveler):
+    name = "mode"
+    description = "Prend les 200 premiers points et utilise leur valeur la plus fréquente pour mettre à zéro"
+
+    def __init__(self, use_jit:bool=True):
+        super().__init__(use_jit)
+        # For the mode of the integer samples
+        self.histogram = IntegerHistogram()
+
+    def baseline(self, block:np.ndarray, repeat:int) -> np.ndarray:
+        # The most frequent value of the 200 first samples of the record
+        return self.histogram.mode(block[:, :200 // repeat])
@@ -0,0 +1,57 @@
+import numpy as np
+
+from typing import Tuple
+
+
+# Finds where the pulse of each record starts, peaks and ends with two thresholds scaled to
+# the noise of the record (hysteresis): the pulse is the samples around the peak over the low
+# threshold, if the peak is over the high threshold. Every row is done at once (no loop).
+class PulseDetector:
+    def __init__(self, high:float=5.0, low:float=2.0):
+        # Thresholds (in standard deviations of the noise)
+        self.high = high
+        self.low = low
+
+    def noise(self, block:np.ndarray) -> np.ndarray:
+        """
+        Robust standard deviation of the noise of each record (in LSB), from the median of
+        |derivative|: the few samples of the edges of the pulse don't change it.
+        At least 1 LSB (the resolution of the ADC).
+        """
+        if block.shape[1] < 2:
+            return np.ones(len(block))
+        deriver = np.diff(block.astype(np.int32), axis=1)
+        np.abs(deriver, out=deriver)
+        # MAD --> standard deviation, and the difference of two samples has sqrt(2) times the noise
+        sigma = 1.4826 * np.median(deriver, axis=1) / np.sqrt(2)
+        return np.maximum(sigma, 1.0)
+
+    def detect(self, block:np.ndarray, baseline:np.ndarray|None=None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        block: raw pulses (integers), baseline: of each pulse (the median of the record if None)
+        Returns start, peak, end (samples kept, the pulse is [start, end[) and if a pulse was
+        found. Without a pulse, the window is the highest sample only.
+        """
+        n_pulses, n_samples = block.shape
+        if n_pulses == 0 or n_samples == 0:
+            empty = np.zeros(n_pulses, dtype=np.int64)
+            return empty, empty, empty + 1, np.zeros(n_pulses, dtype=bool)
+        if baseline is None:
+            baseline = np.median(block, axis=1)
+        sigma = self.noise(block)
+
+        # Distance from the baseline (positive and negative pulses)
+        amplitude = np.abs(block - baseline[:, np.newaxis])
+        rows = np.arange(n_pulses)
+        peak = np.argmax(amplitude, axis=1)
+        found = amplitude[rows, peak] > self.high * sigma
+
+        # The pulse goes on while the samples are over the low threshold
+        cols = np.arange(n_samples)
+        below = amplitude <= (self.low * sigma)[:, np.newaxis]
+        del amplitude
+        start = np.where(below & (cols < peak[:, np.newaxis]), cols, -1).max(axis=1) + 1
+        end = np.where(below & (cols > peak[:, np.newaxis]), cols, n_samples).min(axis=1)
+        start[~found] = peak[~found]
+        end[~found] = peak[~found] + 1
+        return start, peak, end, found
@@ -0,0 +1,16 @@
+import numpy as np
+
+from src.Model.Stages.Segmenter import Segmenter
+
+from typing import Tuple
+
+
+# One pulse per record, from the start to the end of the record (the window of the integrator if it has one)
+class RecordSegmenter(Segmenter):
+    name = "record"
+    description = "Un seul pulse par enregistrement"
+
+    def segment(self, block:np.ndarray, baseline:np.ndarray, repeat:int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        n_pulses, n_samples = block.shape
+        return (np.arange(n_pulses), np.zeros(n_pulses, dtype=np.int64),
+                np.full(n_pulses, n_samples, dtype=np.int64))
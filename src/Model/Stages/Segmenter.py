@@ -0,0 +1,35 @@
+import numpy as np
+
+from src.Model.Stages.Stage import Stage
+
+from typing import Tuple
+
+
+# Finds the pulses of each record. At high repetition rates a record can hold many pulses
+# (pile-up), each one is then a line of the table of the pulses (see AnalysisEngine.analyse)
+class Segmenter(Stage):
+    kind = "segmenter"
+    # The segmenters that can find many pulses in a record (the others give one pulse per record)
+    splits:bool = False
+
+    # The other Segmenter classes must change this
+    def segment(self, block:np.ndarray, baseline:np.ndarray, repeat:int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        block: raw pulses (integers, one record per row), baseline: of each record (in LSB)
+        Returns the record (row of block), start and end (samples kept, [start, end[) of
+        each pulse found, ordered by record and by start
+        """
+        raise NotImplementedError
+
+    def widen(self, record:np.ndarray, start:np.ndarray, end:np.ndarray,
+              margin:int, n_samples:int) -> Tuple[np.ndarray, np.ndarray]:
+        # Adds the margin on both sides of each pulse, without going over the pulses next to it
+        # (the samples between two pulses are shared in the middle) or out of the record
+        next_start = np.full(len(start), n_samples, dtype=np.int64)
+        last_end = np.zeros(len(end), dtype=np.int64)
+        same_record = record[1:] == record[:-1]
+        next_start[:-1][same_record] = start[1:][same_record]
+        last_end[1:][same_record] = end[:-1][same_record]
+        middle_after = end + (next_start - end) // 2
+        middle_before = last_end + (start - last_end) // 2
+        return np.maximum(start - margin, middle_before), np.minimum(end + margin, middle_after)
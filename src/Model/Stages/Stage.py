@@ -0,0 +1,9 @@
+# Base class of the analysis stages (leveler, integrator, dose model and segmenter, see StageRegistry)
+# Every stage works on a block of pulses (one per row) and gives one value per pulse
+class Stage:
+    # Kind of stage, the name of its parameter in the Analyse tab depends on it
+    kind:str = "stage"
+    # Name shown in the Analyse parameters (and saved in parameters.txt)
+    name:str = "default"
+    # Description shown in the Analyse parameters
+    description:str = ""
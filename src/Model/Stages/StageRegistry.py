@@ -0,0 +1,61 @@
+from src.Model.Stages.Stage import Stage
+from src.Model.Stages.MedianLeveler import MedianLeveler
+from src.Model.Stages.DynamicMeanLeveler import DynamicMeanLeveler
+from src.Model.Stages.DynamicMedianLeveler import DynamicMedianLeveler
+from src.Model.Stages.ModeLeveler import ModeLeveler
+from src.Model.Stages.DynamicModeLeveler import DynamicModeLeveler
+from src.Model.Stages.HysteresisLeveler import HysteresisLeveler
+from src.Model.Stages.TrapezoidIntegrator import TrapezoidIntegrator
+from src.Model.Stages.HRMIntegrator import HRMIntegrator
+from src.Model.Stages.WindowIntegrator import WindowIntegrator
+from src.Model.Stages.LinearDoseModel import LinearDoseModel
+from src.Model.Stages.RecordSegmenter import RecordSegmenter
+from src.Model.Stages.HysteresisSegmenter import HysteresisSegmenter
+
+from typing import Dict, List, Tuple
+
+
+# Keeps the stages of the analysis by kind ('leveler', 'integrator', 'dose' and 'segmenter') and name.
+# The names of a kind are the choices of its parameter in the Analyse tab, so a new stage
+# only has to be registered here to be usable (and benchmarked, see AnalysisEngine.benchmark)
+class StageRegistry:
+    def __init__(self):
+        self.stages:Dict[str, List[Stage]] = {}
+        # Used when the name of a stage is unknown (old parameters.txt, typo in the cli)
+        self.defaults:Dict[str, Stage] = {}
+        self.register(MedianLeveler())
+        self.register(DynamicMeanLeveler(), default=True)
+        self.register(DynamicMedianLeveler())
+        self.register(ModeLeveler())
+        self.register(DynamicModeLeveler())
+        self.register(HysteresisLeveler())
+        self.register(TrapezoidIntegrator(), default=True)
+        self.register(HRMIntegrator())
+        self.register(WindowIntegrator())
+        self.register(LinearDoseModel(), default=True)
+        self.register(RecordSegmenter(), default=True)
+        self.register(HysteresisSegmenter())
+
+    def register(self, stage:Stage, default:bool=False):
+        stages = self.stages.setdefault(stage.kind, [])
+        # A stage with the same name replaces the old one (a faster implementation for example)
+        stages[:] = [old for old in stages if old.name != stage.name]
+        stages.append(stage)
+        if default or stage.kind not in self.defaults or self.defaults[stage.kind].name == stage.name:
+            self.defaults[stage.kind] = stage
+
+    def get(self, kind:str, name:str) -> Stage:
+        for stage in self.stages.get(kind, []):
+            if stage.name == name:
+                return stage
+        return self.defaults[kind]
+
+    def all(self, kind:str) -> List[Stage]:
+        return list(self.stages.get(kind, []))
+
+    def names(self, kind:str) -> Tuple[str, ...]:
+        return tuple(stage.name for stage in self.stages.get(kind, []))
+
+    def describe(self, kind:str) -> str:
+        # Description of the parameter of a kind: one line per stage
+        return '\n'.join(f"'{stage.name}': {stage.description}" for stage in self.stages.get(kind, []))
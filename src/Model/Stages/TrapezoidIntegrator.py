@@ -0,0 +1,38 @@
+import numpy as np
+
+from src.Model.Stages.Integrator import Integrator
+
+from typing import Tuple
+
+
+# Trapezoid method with matrices
+class TrapezoidIntegrator(Integrator):
+    name = "trap"
+    description = "Utilise la méthode des trapèzes"
+    uses_counts = True
+
+    def area(self, pulses:np.ndarray, repeat:int, dt:float,
+             window:Tuple[np.ndarray, np.ndarray]|None=None, rows:np.ndarray|None=None) -> np.ndarray:
+        if window is not None or rows is not None:
+            # Every sample counts for a whole dt, except the first and the last one of the window
+            sums, first, last, _ = self.window_sums(pulses, window, np.float64, rows)
+            return (sums - (first + last) / (2 * repeat)) * dt
+        # Sum of the trapezoids: every sample counts for a whole dt, except the first and
+        # the last one of the record (half of a dt between two samples of the record)
+        first = pulses[:, 0]
+        last  = pulses[:, -1]
+        return (np.sum(pulses, axis=1, dtype=np.float64) - (first + last) / (2 * repeat)) * dt
+
+    def area_counts(self, block:np.ndarray, baseline:np.ndarray, repeat:int,
+                    window:Tuple[np.ndarray, np.ndarray]|None=None, rows:np.ndarray|None=None) -> np.ndarray:
+        if window is not None or rows is not None:
+            sums, first, last, length = self.window_sums(block, window, np.int64, rows)
+        else:
+            sums = np.sum(block, axis=1, dtype=np.int64)
+            first, last, length = block[:, 0], block[:, -1], block.shape[1]
+        # 2 * repeat * (sum - (first + last) / (2 * repeat)), exact with integers
+        total = 2 * repeat * sums
+        total -= first
+        total -= last
+        # The baseline counts for every sample but half of the first and last one of the window
+        return total / (2 * repeat) - baseline * (length - 1 / repeat)
@@ -0,0 +1,8 @@
+from src.Model.Stages.TrapezoidIntegrator import TrapezoidIntegrator
+
+
+# Trapezoid method on the window of the pulse only (the baseline noise around it isn't integrated)
+class WindowIntegrator(TrapezoidIntegrator):
+    name = "trap-window"
+    description = "Utilise la méthode des trapèzes seulement sur le pulse (du début à la fin trouvés avec la dérivée, plus la marge)"
+    uses_window = True
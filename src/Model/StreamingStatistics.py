@@ -0,0 +1,115 @@
+import math
+import numpy as np
+
+from typing import Dict
+
+# Relative error of the quantiles (a median of 140 cGy is within 0.14 cGy)
+RELATIVE_ACCURACY = 1e-3
+
+
+# Statistics of values given one (or a block) at a time, with a memory that doesn't depend
+# on the number of values: count, total, mean and variance (Welford, blocks are merged with
+# Chan's formula), min, max and a sketch of the quantiles.
+# The sketch keeps how many values fall in buckets whose bounds grow geometrically, so any
+# quantile is given with a relative error smaller than relative_accuracy.
+class StreamingStatistics:
+    def __init__(self, relative_accuracy:float=RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.total = 0.0
+        self.mean = 0.0
+        # Sum of the squares of the differences with the mean
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        # Quantile sketch: {bucket: count} of the positive and negative values
+        self.positive:Dict[int, int] = {}
+        self.negative:Dict[int, int] = {}
+        self.zeros = 0
+
+    def update(self, values):
+        # values: one value or an array of them (NaN are ignored)
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        n = len(values)
+        if n == 0:
+            return
+        block_mean = float(np.mean(values))
+        block_m2 = float(np.sum((values - block_mean) ** 2))
+        self.merge_moments(n, block_mean, block_m2)
+        self.total += float(np.sum(values))
+        self.min = min(self.min, float(np.min(values)))
+        self.max = max(self.max, float(np.max(values)))
+
+        self.zeros += int(np.count_nonzero(values == 0))
+        for sketch, side in ((self.positive, values[values > 0]), (self.negative, -values[values < 0])):
+            if len(side) == 0:
+                continue
+            buckets, counts = np.unique(np.ceil(np.log(side) / np.log(self.gamma)).astype(np.int64), return_counts=True)
+            for bucket, count in zip(buckets.tolist(), counts.tolist()):
+                sketch[bucket] = sketch.get(bucket, 0) + count
+
+    def merge(self, other:"StreamingStatistics"):
+        # Adds the values of other (of another block, channel or process), same relative_accuracy
+        if other.count == 0:
+            return
+        self.merge_moments(other.count, other.mean, other.m2)
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.zeros += other.zeros
+        for sketch, other_sketch in ((self.positive, other.positive), (self.negative, other.negative)):
+            for bucket, count in other_sketch.items():
+                sketch[bucket] = sketch.get(bucket, 0) + count
+
+    def merge_moments(self, n:int, mean:float, m2:float):
+        count = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / count
+        self.m2 += m2 + delta ** 2 * self.count * n / count
+        self.count = count
+
+    def variance(self) -> float:
+        # Of the sample (n - 1), NaN with less than 2 values
+        return self.m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    def std(self) -> float:
+        return math.sqrt(self.variance())
+
+    def quantile(self, q:float) -> float:
+        # Value under which there's a fraction q of the values (within relative_accuracy)
+        if self.count == 0:
+            return math.nan
+        rank = q * (self.count - 1)
+        value = self.max
+        seen = 0
+        # From the most negative value to the most positive one
+        buckets = [(-self.bucket_value(bucket), self.negative[bucket]) for bucket in sorted(self.negative, reverse=True)]
+        buckets.append((0.0, self.zeros))
+        buckets += [(self.bucket_value(bucket), self.positive[bucket]) for bucket in sorted(self.positive)]
+        for bucket_value, count in buckets:
+            seen += count
+            if seen > rank:
+                value = bucket_value
+                break
+        # The buckets at the ends can be wider than the values in them
+        return min(max(value, self.min), self.max)
+
+    def bucket_value(self, bucket:int) -> float:
+        # Middle of the bucket ]gamma^(bucket - 1), gamma^bucket] (in relative error)
+        return 2 * self.gamma ** bucket / (self.gamma + 1)
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            'count'  : self.count,
+            'total'  : self.total,
+            'mean'   : self.mean if self.count else math.nan,
+            'std'    : self.std(),
+            'min'    : self.min if self.count else math.nan,
+            'max'    : self.max if self.count else math.nan,
+            'median' : self.quantile(0.5),
+        }
@@ -0,0 +1,68 @@
+import numpy as np
+
+from typing import Tuple
+
+# Time unit of the index: the timestamps are int64 picoseconds (CoMPASS TIMETAG unit)
+PS_PER_S = 10**12
+
+
+# Time of each pulse with its dose, sorted by time once, so a shoot can be sliced by time:
+# the dose of [t0, t1[ is the difference of two cumulative sums found with np.searchsorted
+# (O(log n)), the intervals and the dose rate are one np.diff / np.bincount (O(n)).
+# The times stay int64 (no float rounding on shoots of many hours).
+class TimeIndex:
+    def __init__(self, times:np.ndarray, doses:np.ndarray):
+        times = np.asarray(times, dtype=np.int64)
+        doses = np.asarray(doses, dtype=np.float64)
+        # The pulses are usually already in order (one np.diff to check)
+        if len(times) > 1 and np.any(times[1:] < times[:-1]):
+            order = np.argsort(times, kind='stable')
+            times, doses = times[order], doses[order]
+        self.times = times
+        self.doses = doses
+        # cumulative[k]: dose of the k first pulses
+        self.cumulative = np.concatenate(([0.0], np.cumsum(doses)))
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def span(self, t0:int, t1:int) -> Tuple[int, int]:
+        # Pulses [first, last[ of the time window [t0, t1[
+        return int(np.searchsorted(self.times, t0, side='left')), int(np.searchsorted(self.times, t1, side='left'))
+
+    def count_between(self, t0:int, t1:int) -> int:
+        first, last = self.span(t0, t1)
+        return last - first
+
+    def dose_between(self, t0:int, t1:int) -> float:
+        first, last = self.span(t0, t1)
+        return float(self.cumulative[last] - self.cumulative[first])
+
+    def intervals(self) -> np.ndarray:
+        # Time between each pulse and the next one
+        return np.diff(self.times)
+
+    def frequency(self) -> float:
+        # Repetition frequency of the pulses (Hz), from the median interval (a missed pulse doesn't change it)
+        intervals = self.intervals()
+        intervals = intervals[intervals > 0]
+        if len(intervals) == 0:
+            return np.nan
+        return PS_PER_S / float(np.median(intervals))
+
+    def dose_rate(self, bin_width:int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Dose of each bin of bin_width (from the first pulse), divided by the width in s.
+        Returns the start of the bins and the dose rate (cGy/s)
+        """
+        if len(self.times) == 0 or bin_width <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        bins = (self.times - self.times[0]) // bin_width
+        rate = np.bincount(bins, weights=self.doses) / (bin_width / PS_PER_S)
+        return self.times[0] + bin_width * np.arange(len(rate), dtype=np.int64), rate
+
+    def mean_dose_rate(self) -> float:
+        # Total dose over the time from the first to the last pulse (cGy/s)
+        if len(self.times) < 2 or self.times[-1] == self.times[0]:
+            return np.nan
+        return float(self.cumulative[-1]) / ((self.times[-1] - self.times[0]) / PS_PER_S)
@@ -0,0 +1,38 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from typing import Any, Callable, Dict, Hashable
+
+
+# Runs a function on many tasks at the same time in worker processes (one task per process),
+# or one task after the other in this process when there's only one (starting the processes
+# would take longer). The function must be a module level function so it can be sent to the
+# worker processes, with arguments that can be pickled.
+class WorkerPool:
+    def __init__(self, workers:int|None=None):
+        # Number of worker processes (None: one per core)
+        self.workers = workers or os.cpu_count() or 1
+
+    def run(self, function:Callable[..., Any], tasks:Dict[Hashable, tuple],
+            done:Callable[[Any], None]|None=None, in_process:bool=False) -> Dict[Hashable, Any]:
+        """
+        tasks: {key: arguments of function}
+        done is called (in this process) with the result of every task, as soon as it's done.
+        in_process: do the tasks in this process anyway (too little work for the processes)
+        Returns the result of each task: {key: result}
+        """
+        results:Dict[Hashable, Any] = {}
+        if in_process or self.workers == 1 or len(tasks) <= 1:
+            for key, arguments in tasks.items():
+                results[key] = function(*arguments)
+                if done is not None:
+                    done(results[key])
+            return results
+
+        with ProcessPoolExecutor(min(self.workers, len(tasks))) as pool:
+            futures = {pool.submit(function, *arguments): key for key, arguments in tasks.items()}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+                if done is not None:
+                    done(results[futures[future]])
+        return results
@@ -4,9 +4,6 @@ from typing import TYPE_CHECKING, Any, Dict
 
 import threading
 
-# To install the module: pip install caen-felib
-from caen_felib import lib, device, error
-
 if TYPE_CHECKING:
     from src.Controller.ViewController import ViewController
     from src.View.Style import FLASHyStyle
@@ -59,7 +59,7 @@ class FileSelector(ttk.Frame):
     def select_file(self):
         file_path = filedialog.askopenfilename(
             title="Select the file to analyse",
-            filetypes=(("CSV", "*.csv"), ("Raw", "*.dat"), ("All files", "*.*"))
+            filetypes=(("CSV", "*.csv"), ("Raw", "*.dat"), ("CoMPASS binaire", "*.bin"), ("All files", "*.*"))
         )
         if not file_path:
             self.feedback.insert_text("Please select a file")
@@ -99,10 +99,20 @@ class FileSelector(ttk.Frame):
         if not self.path_to_data:
             self.feedback.insert_text("Please select a file!")
             return
+        # Read and analyse the file one block of pulses at a time
+        by_blocks = self.view_controller.controller.get_READING_MODE() == 'par blocs'
         self.feedback.insert_text("Reading file...")
         # Check if there's a problem when reading the file
         try:
-            result = self.analyser.read_file(self.path_to_data)
+            if by_blocks:
+                result = self.analyser.stream_file(self.path_to_data)
+            elif self.analyser.is_read(self.path_to_data):
+                # Same file: only the stages whose parameters changed are done again
+                self.feedback.insert_text("File already read, analysing again with the new parameters")
+                self.analyser.prep_data()
+                result = True
+            else:
+                result = self.analyser.read_file(self.path_to_data)
             if not result:
                 return
         except IOError as e:
@@ -118,12 +128,9 @@ class FileSelector(ttk.Frame):
             raise e
             return
         
-        self.feedback.insert_text("Leveling data...")
-        self.analyser.level_data()
-        self.feedback.insert_text("Calculating areas under the curves...")
-        self.analyser.calculate_area()
-        self.feedback.insert_text("Calculating dosage...")
-        self.analyser.calculate_dose()
+        if not by_blocks: # Already done block by block
+            self.feedback.insert_text("Analysing pulses...")
+            self.analyser.analyse_pulses()
         self.feedback.insert_text("Updating graphs et list...")
         self.graph_showcase.update_pulse_graph()
         self.graph_showcase.update_area_graph()
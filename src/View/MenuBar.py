@@ -24,6 +24,8 @@ class MenuBar(tk.Menu):
                               command=lambda: parent.call_analyse_csv())
         analyse_menu.add_command(label="Novelle Analyse - RAW",
                               command=lambda: parent.call_analyse_raw())
+        analyse_menu.add_command(label="Analyse en lot - Projet",
+                              command=lambda: parent.call_batch_analyse())
         analyse_menu.add_separator()
         analyse_menu.add_command(label="Commencer mesure",
                                  command= lambda: parent.call_mesure())
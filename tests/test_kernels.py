@@ -0,0 +1,70 @@
+'''
+The kernels of the dynamic levelers (see src/Model/Stages/Kernels.py) must give exactly
+the same bonds and baselines as the NumPy path of DynamicLeveler, compiled or not.
+'''
+import numpy as np
+import pytest
+
+from src.Model.Stages import Kernels
+from src.Model.Stages.DynamicMeanLeveler import DynamicMeanLeveler
+from src.Model.Stages.DynamicMedianLeveler import DynamicMedianLeveler
+
+N_RECORDS = 24
+N_SAMPLES = 300
+
+
+def make_records(kind:str) -> np.ndarray:
+    # Raw pulses (int16) like the ones of the digitizer: baseline around 8000 LSB, negative pulses
+    rng = np.random.default_rng(0)
+    if kind == 'constant':
+        return np.full((N_RECORDS, N_SAMPLES), 8000, dtype=np.int16)
+    records = 8000 + rng.normal(0, 3, (N_RECORDS, N_SAMPLES))
+    if kind == 'pulsed':
+        t = np.arange(N_SAMPLES)
+        centers = rng.integers(40, N_SAMPLES - 40, N_RECORDS)
+        widths = rng.uniform(3, 15, N_RECORDS)
+        heights = rng.uniform(100, 2000, N_RECORDS)
+        records -= heights[:, None] * np.exp(-0.5 * ((t - centers[:, None]) / widths[:, None]) ** 2)
+    return np.round(records).astype(np.int16)
+
+
+def kernel_sets() -> list:
+    # The compiled kernels are only tested when Numba is installed
+    def compiled():
+        pytest.importorskip('numba')
+        return Kernels.jit_kernels()
+    return [pytest.param(lambda: Kernels, id='python'), pytest.param(compiled, id='numba')]
+
+
+@pytest.fixture(params=kernel_sets())
+def kernels(request):
+    return request.param()
+
+
+@pytest.mark.parametrize('kind', ['flat', 'constant', 'pulsed'])
+@pytest.mark.parametrize('repeat', [1, 2, 3])
+def test_kernels_match_numpy(kernels, kind:str, repeat:int):
+    block = make_records(kind)
+    mean_leveler = DynamicMeanLeveler(use_jit=False)
+    median_leveler = DynamicMedianLeveler(use_jit=False)
+    left_bond, right_bond = mean_leveler.bonds(block, repeat)
+
+    kernel_left = np.empty(len(block), dtype=np.int64)
+    kernel_right = np.empty(len(block), dtype=np.int64)
+    kernels.find_bonds(block, 10.0, repeat, kernel_left, kernel_right)
+    np.testing.assert_array_equal(kernel_left, left_bond)
+    np.testing.assert_array_equal(kernel_right, right_bond)
+
+    for kernel, leveler in (('baseline_mean', mean_leveler), ('baseline_median', median_leveler)):
+        baseline = np.empty(len(block))
+        getattr(kernels, kernel)(block, repeat, left_bond, right_bond, baseline)
+        np.testing.assert_allclose(baseline, leveler.statistic(block, repeat, left_bond, right_bond), rtol=1e-12)
+
+
+def test_bonds_and_baseline():
+    # The bonds are around each pulse, a record without pulse is all baseline
+    left_bond, right_bond = DynamicMeanLeveler(use_jit=False).bonds(make_records('pulsed'), 1)
+    assert np.all(left_bond < right_bond)
+    constant = make_records('constant')
+    for leveler in (DynamicMeanLeveler(use_jit=False), DynamicMedianLeveler(use_jit=False)):
+        np.testing.assert_array_equal(leveler.baseline(constant, 2), 8000)
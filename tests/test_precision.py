@@ -0,0 +1,52 @@
+'''
+The leveled pulses can be float32 (PRECISION) to use half the memory, the sums are
+always done in float64 (see AnalysisEngine.working_dtype). The dose of a shoot must
+not change more than RELATIVE_TOLERANCE from float64 to float32.
+'''
+import os
+import pytest
+
+from src.Model.AnalysisSettings import AnalysisSettings
+from src.Model.BatchAnalyser import analyse_shoot
+from src.Model.Stages.StageRegistry import StageRegistry
+
+# float32 keeps 24 bits (about 6e-8 of relative error per sample), the pulses are integers below 2**14
+RELATIVE_TOLERANCE = 1e-6
+SHOOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'pulses-100.CSV')
+STAGES = StageRegistry()
+
+
+def settings(precision:str, leveling:str, area:str, segmentation:str, coarse_gain:float) -> AnalysisSettings:
+    # Default parameters of the program (see cli.py), without the cache
+    return AnalysisSettings({
+        'RECORD_LENGHT'           : '15000',
+        'AREA_CALCULATION_METHOD' : area,
+        'LEVELING_METHOD'         : leveling,
+        'WINDOW_MARGIN'           : 200,
+        'STD_THRESHOLD'           : 10,
+        'RANGE_THRESHOLD'         : 10,
+        'PRECISION'               : precision,
+        'DOSE_MODEL'              : 'linear',
+        'SEGMENTATION_METHOD'     : segmentation,
+        'DOSE_FACTOR'             : 2.0,
+        'READING_MODE'            : 'complet',
+        'BLOCK_SIZE'              : 4096,
+        'CACHE_SIZE'              : 0,
+        'COARSEGAIN'              : coarse_gain,
+        'ADC_NBIT'                : 14,
+    })
+
+
+# With 3 Vpp, one LSB is 3 * 2**-14 V: exact in float32, not with 0.3 Vpp
+@pytest.mark.parametrize('coarse_gain', [3, 0.3])
+@pytest.mark.parametrize('segmentation', STAGES.names('segmenter'))
+@pytest.mark.parametrize('area', STAGES.names('integrator'))
+@pytest.mark.parametrize('leveling', STAGES.names('leveler'))
+def test_float32_dose(leveling:str, area:str, segmentation:str, coarse_gain:float):
+    rows = {precision: analyse_shoot(SHOOT, settings(precision, leveling, area, segmentation, coarse_gain))
+            for precision in ('float64', 'float32')}
+    for row in rows.values():
+        assert row['error'] == ''
+        assert row['pulses'] > 0
+    assert rows['float32']['pulses'] == rows['float64']['pulses']
+    assert rows['float32']['total_dose'] == pytest.approx(rows['float64']['total_dose'], rel=RELATIVE_TOLERANCE)